@@ -0,0 +1,4 @@
+"""
+Benchmarks for the import pipeline.
+Generates synthetic Khan Academy exports and measures scoring and insert throughput.
+"""
@@ -0,0 +1,124 @@
+import argparse
+import csv
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Same columns, in the same order, as a real "All assignments" export
+COLUMNS = [
+    "Assignment Name",
+    "Student Name",
+    "Score At Due Date",
+    "Score Best Ever",
+    "Points Possible",
+    "Number Of Attempts",
+    "Most Recent Completion Date",
+    "Start Date",
+    "Due Date",
+    "Assignment URL",
+    "Assignment Type"
+]
+
+# Assignment type mix and points possible, roughly as seen in real exports
+ASSIGNMENT_TYPES = [
+    ("Exercise", 32, 4),
+    ("Video", 32, None),
+    ("Article", 21, None),
+    ("Quiz", 9, 5),
+    ("Unit Test", 5, 10),
+    ("Course Challenge", 1, 30)
+]
+
+CLASS_NAME = "Synthetic Class"
+
+def khan_timestamp(moment: datetime) -> str:
+    """Format a datetime the way Khan exports do, e.g. 'Feb 25th, 2:40AM'"""
+    day = moment.day
+    suffix = "th" if 11 <= day <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
+    return f"{moment:%b} {day}{suffix}, {moment.hour % 12 or 12}:{moment:%M%p}"
+
+def export_filename(export_date: datetime) -> str:
+    return f"Downloaded {export_date:%Y.%m.%d} - All assignments - {CLASS_NAME}.csv"
+
+class SyntheticClass:
+    """A class whose students work through a fixed set of assignments over time.
+
+    Each student starts each assignment on a random day (or never) and keeps
+    attempting it at their own pace, so consecutive exports differ in only a
+    fraction of rows, as real ones do.
+    """
+
+    def __init__(self, students: int, assignments: int, days: int, start: datetime, seed: int = 0):
+        rng = random.Random(seed)
+        self.start = start
+        self.students = [f"STUDENT {i:05d}" for i in range(students)]
+        
+        weights = [weight for _, weight, _ in ASSIGNMENT_TYPES]
+        self.assignments = []
+        for i in range(assignments):
+            assignment_type, _, points = rng.choices(ASSIGNMENT_TYPES, weights)[0]
+            slug = f"synthetic-{assignment_type.lower().replace(' ', '-')}-{i}"
+            self.assignments.append((f"Synthetic {assignment_type} {i}", assignment_type, points, slug))
+        
+        # Per student and assignment: first day worked on, days between attempts
+        # and attempts needed for full marks. Half never start within the window.
+        self.progress = [
+            [(rng.randrange(days * 2), rng.randint(1, 5), rng.randint(1, 6)) for _ in self.assignments]
+            for _ in self.students
+        ]
+        self.start_date = khan_timestamp(start)
+        self.due_date = khan_timestamp(start + timedelta(days=days + 30))
+
+    def rows(self, day: int):
+        """Yield the CSV rows of the export taken `day` days after the start"""
+        for a, (assignment_name, assignment_type, points, slug) in enumerate(self.assignments):
+            url = f"https://www.khanacademy.org/synthetic/{slug}"
+            for s, student_name in enumerate(self.students):
+                first_day, pace, needed = self.progress[s][a]
+                row = [assignment_name, student_name, "", "", "", "", "", self.start_date, self.due_date, url, assignment_type]
+                if points is None:
+                    # Videos and articles carry no scores or attempts
+                    if day >= first_day:
+                        row[6] = khan_timestamp(self.start + timedelta(days=first_day, hours=10))
+                elif day < first_day:
+                    row[5] = "0"
+                else:
+                    attempts = 1 + (day - first_day) // pace
+                    score = min(points, points * attempts // needed)
+                    last_attempt = first_day + (attempts - 1) * pace
+                    row[2] = row[3] = str(score)
+                    row[4] = str(points)
+                    row[5] = str(attempts)
+                    row[6] = khan_timestamp(self.start + timedelta(days=last_attempt, hours=10))
+                yield row
+
+    def write_export(self, directory: Path, day: int) -> Path:
+        export_date = self.start + timedelta(days=day)
+        path = directory / export_filename(export_date)
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(self.rows(day))
+        return path
+
+def generate(directory: Path, students: int, assignments: int, days: int, start: datetime, seed: int = 0):
+    """Write `days` consecutive daily exports into directory and return their paths"""
+    directory.mkdir(parents=True, exist_ok=True)
+    synthetic = SyntheticClass(students, assignments, days, start, seed)
+    return [synthetic.write_export(directory, day) for day in range(days)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic Khan Academy exports")
+    parser.add_argument("--out", type=Path, required=True, help="directory to write the CSV files into")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=100)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--start", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=datetime(2025, 1, 6))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    files = generate(args.out, args.students, args.assignments, args.days, args.start, args.seed)
+    print(f"Wrote {len(files)} exports of {args.students * args.assignments:,} rows each to {args.out}")
+
+if __name__ == "__main__":
+    main()
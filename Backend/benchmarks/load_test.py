@@ -0,0 +1,197 @@
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from os.path import dirname, abspath
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+RESULTS_DIR = Path(dirname(abspath(__file__))) / "results"
+
+# What a class opening the dashboard asks for, and how often relative to each other
+ROUTE_MIX = [
+    ("/students", "/api/khan/students", 2),
+    ("/rankings/current/mastery", "/api/khan/rankings/current/mastery", 3),
+    ("/rankings/current/perseverance", "/api/khan/rankings/current/perseverance", 2),
+    ("/student/{name}/progress", "/api/khan/student/{name}/progress", 4),
+    ("/overall/progress", "/api/khan/overall/progress", 2)
+]
+
+def with_class(path, class_id):
+    """Scope a request to one class; the API requires it once several are imported"""
+    if not class_id:
+        return path
+    return f"{path}{'&' if '?' in path else '?'}class_id={quote(class_id)}"
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Worker(threading.Thread):
+    """One simulated dashboard user issuing requests back to back on a keep-alive connection"""
+
+    def __init__(self, base_url, class_id, students, deadline, revalidate, seed):
+        super().__init__(daemon=True)
+        self.base = urlsplit(base_url)
+        self.class_id = class_id
+        self.students = students
+        self.deadline = deadline
+        self.revalidate = revalidate
+        self.rng = random.Random(seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.not_modified = defaultdict(int)
+        self.etags = {}
+
+    def connect(self):
+        connection_class = http.client.HTTPSConnection if self.base.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.base.hostname, self.base.port, timeout=30)
+
+    def run(self):
+        routes = [(label, path) for label, path, _ in ROUTE_MIX]
+        weights = [weight for _, _, weight in ROUTE_MIX]
+        connection = self.connect()
+        while time.monotonic() < self.deadline:
+            label, path = self.rng.choices(routes, weights)[0]
+            if "{name}" in path:
+                path = path.format(name=quote(self.rng.choice(self.students)))
+            path = with_class(path, self.class_id)
+            headers = {}
+            if self.revalidate and path in self.etags:
+                headers["If-None-Match"] = self.etags[path]
+
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors[label] += 1
+                connection.close()
+                connection = self.connect()
+                continue
+            elapsed = time.perf_counter() - start
+
+            if response.status == 304:
+                self.not_modified[label] += 1
+            elif response.status >= 400:
+                self.errors[label] += 1
+                continue
+            if response.getheader("ETag"):
+                self.etags[path] = response.getheader("ETag")
+            self.latencies[label].append(elapsed)
+        connection.close()
+
+def fetch_students(base_url, class_id, limit):
+    """Student names to request progress for, from the API itself"""
+    base = urlsplit(base_url)
+    connection = http.client.HTTPConnection(base.hostname, base.port, timeout=30)
+    connection.request("GET", with_class(f"/api/khan/students?limit={limit}", class_id))
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"GET /api/khan/students returned {response.status}")
+    return [student["student_name"] for student in json.loads(body)]
+
+def run_level(base_url, class_id, students, concurrency, duration, revalidate):
+    """Drive the route mix with `concurrency` users for `duration` seconds"""
+    deadline = time.monotonic() + duration
+    workers = [Worker(base_url, class_id, students, deadline, revalidate, seed) for seed in range(concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for label, _, _ in ROUTE_MIX:
+        latencies = sorted(value for worker in workers for value in worker.latencies[label])
+        errors = sum(worker.errors[label] for worker in workers)
+        routes[label] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "not_modified": sum(worker.not_modified[label] for worker in workers),
+            "throughput": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None
+        }
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "throughput": round(sum(route["requests"] for route in routes.values()) / elapsed, 1),
+        "routes": routes
+    }
+
+def print_level(level):
+    print(f"\nConcurrency {level['concurrency']}: {level['throughput']:,} req/s over {level['seconds']}s")
+    print(f"  {'route':<32}{'req':>8}{'err':>6}{'304':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, route in level["routes"].items():
+        cells = [f"{route[key]:>9}" if route[key] is not None else f"{'-':>9}" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"  {label:<32}{route['requests']:>8}{route['errors']:>6}{route['not_modified']:>7}"
+              f"{route['throughput']:>9}{''.join(cells)}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the dashboard API. Start it first (python main.py) against a database "
+                    "seeded with scripts/import_khan_csv.py, e.g. from benchmarks/generate_khan_csv.py output."
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--class-id", default=None,
+                        help="class to request; required once several classes are imported")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=20, help="seconds per concurrency level")
+    parser.add_argument("--students", type=int, default=200, help="how many student names to spread requests over")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match with the last ETag, as a polling browser does")
+    parser.add_argument("--slo-p95-ms", type=float, default=None,
+                        help="exit non-zero if any route's p95 latency exceeds this")
+    parser.add_argument("--output", type=Path, default=None, help="where to save the JSON results")
+    args = parser.parse_args()
+
+    students = fetch_students(args.base_url, args.class_id, args.students)
+    if not students:
+        print("No students found; import some data first")
+        sys.exit(1)
+
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(args.base_url, args.class_id, students, concurrency, args.duration, args.revalidate)
+        print_level(level)
+        levels.append(level)
+
+    output = args.output or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "base_url": args.base_url,
+        "class_id": args.class_id,
+        "duration": args.duration,
+        "revalidate": args.revalidate,
+        "levels": levels
+    }, indent=2))
+    print(f"\nSaved results to {output}")
+
+    if args.slo_p95_ms is not None:
+        breaches = [
+            (level["concurrency"], label, route["p95_ms"])
+            for level in levels
+            for label, route in level["routes"].items()
+            if route["p95_ms"] is not None and route["p95_ms"] > args.slo_p95_ms
+        ]
+        for concurrency, label, p95 in breaches:
+            print(f"SLO breach: {label} p95 {p95} ms > {args.slo_p95_ms} ms at concurrency {concurrency}")
+        if breaches:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
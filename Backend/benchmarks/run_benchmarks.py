@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from os.path import dirname, abspath
+from pathlib import Path
+
+# Add the Backend directory to Python path
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from benchmarks.generate_khan_csv import generate
+from database.schemas import compute_points, iter_assignment_records, process_daily_data
+from scripts import import_khan_csv
+from database.indexes import ensure_indexes
+from scripts.import_khan_csv import (
+    DEFAULT_CLASS_ID,
+    import_daily_data,
+    iter_csv_rows,
+    iter_file_records,
+    parse_date_from_filename
+)
+
+RESULTS_DIR = Path(dirname(abspath(__file__))) / "results"
+BENCHMARK_DATABASE = "Amba_benchmark"
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+def bench_compute_points(files, options):
+    """compute_points over every row of each export, CSV rows already in memory"""
+    rows = seconds = 0
+    for path in files:
+        csv_data = list(iter_csv_rows(path))
+        start = time.perf_counter()
+        for row in csv_data:
+            compute_points(row)
+        seconds += time.perf_counter() - start
+        rows += len(csv_data)
+    return rows, seconds
+
+def bench_process_daily_data(files, options):
+    """Row-by-row scoring of each export, CSV rows already in memory"""
+    rows = seconds = 0
+    for path in files:
+        csv_data = list(iter_csv_rows(path))
+        start = time.perf_counter()
+        process_daily_data(csv_data, parse_date_from_filename(path))
+        seconds += time.perf_counter() - start
+        rows += len(csv_data)
+    return rows, seconds
+
+def bench_file_scoring(files, options):
+    """The importer's path: read and score each export file"""
+    rows = 0
+    start = time.perf_counter()
+    for path in files:
+        student_stats = {}
+        for _ in iter_file_records(path, parse_date_from_filename(path), student_stats):
+            rows += 1
+    return rows, time.perf_counter() - start
+
+def benchmark_client(options):
+    """A client for the insert benchmark: a real server, or mongomock in memory"""
+    if options["mongo_uri"]:
+        import pymongo
+        return pymongo.MongoClient(options["mongo_uri"])
+
+    import mongomock
+    from database.mongomock_compat import patch_bulk_sort
+    patch_bulk_sort()
+    import_khan_csv.IMPORT_TRANSACTIONS = "off"
+    return mongomock.MongoClient()
+
+def bench_insert_to_mongodb(files, options):
+    """insert_to_mongodb's write path, one export after another, into a scratch database.
+
+    import_daily_data is called directly because insert_to_mongodb reports
+    errors and returns 0; here a failure has to fail the benchmark.
+    """
+    client = benchmark_client(options)
+    client.drop_database(BENCHMARK_DATABASE)
+    db = client[BENCHMARK_DATABASE]
+    ensure_indexes(db)
+    rows = seconds = 0
+    try:
+        # The importer reports every step; keep the benchmark output readable
+        with open(os.devnull, 'w') as devnull:
+            for path in sorted(files, key=parse_date_from_filename):
+                csv_data = list(iter_csv_rows(path))
+                start = time.perf_counter()
+                export_date = parse_date_from_filename(path)
+                student_stats = {}
+                records = iter_assignment_records(csv_data, export_date, student_stats)
+                with contextlib.redirect_stdout(devnull):
+                    import_daily_data(records, student_stats, DEFAULT_CLASS_ID, export_date, db)
+                seconds += time.perf_counter() - start
+                rows += len(csv_data)
+    finally:
+        client.drop_database(BENCHMARK_DATABASE)
+    return rows, seconds
+
+BENCHMARKS = {
+    "compute_points": bench_compute_points,
+    "process_daily_data": bench_process_daily_data,
+    "file_scoring": bench_file_scoring,
+    "insert_to_mongodb": bench_insert_to_mongodb
+}
+
+def run_benchmark(name, files, options):
+    """Run one benchmark; called in a fresh process so peak RSS is its own"""
+    rows, seconds = BENCHMARKS[name](files, options)
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, max_regression):
+    """Print the change in rows/s against a saved run; return False on a regression"""
+    baseline = json.loads(Path(baseline_path).read_text())["benchmarks"]
+    ok = True
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("rows_per_second")
+        after = result.get("rows_per_second")
+        if "error" in result:
+            ok = False
+            print(f"  {name:<20} FAILED: {result['error']}")
+            continue
+        if not before or not after:
+            continue
+        change = (after - before) / before * 100
+        regressed = change < -max_regression
+        ok = ok and not regressed
+        print(f"  {name:<20} {before:>12,} -> {after:>12,} rows/s ({change:+.1f}%){'  REGRESSION' if regressed else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV scoring and import throughput")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--assignments", type=int, default=100)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="benchmark existing exports instead of generating synthetic ones")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCHMARK_MONGODB_URI"),
+                        help="server for insert_to_mongodb (its Amba_benchmark database is dropped); "
+                             "defaults to an in-memory mongomock")
+    parser.add_argument("--output", type=Path, default=None, help="where to save the JSON results")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="percent drop in rows/s that fails --compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.data_dir:
+            files = sorted(args.data_dir.glob("*.csv"), key=parse_date_from_filename)
+            scale = {"data_dir": str(args.data_dir)}
+        else:
+            print(f"Generating {args.days} exports of {args.students} students x {args.assignments} assignments...")
+            files = generate(Path(scratch), args.students, args.assignments, args.days, datetime(2025, 1, 6), args.seed)
+            scale = {"students": args.students, "assignments": args.assignments, "days": args.days, "seed": args.seed}
+
+        options = {"mongo_uri": args.mongo_uri}
+        results = {}
+        for name in args.only:
+            # A fresh interpreter per benchmark keeps peak RSS and warm caches separate
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                try:
+                    results[name] = pool.submit(run_benchmark, name, files, options).result()
+                except Exception as e:
+                    print(f"{name}: failed: {str(e)}")
+                    results[name] = {"error": str(e)}
+                    continue
+            result = results[name]
+            print(f"{name:<20} {result['rows']:>10,} rows in {result['seconds']:>8.2f}s "
+                  f"= {result['rows_per_second'] or 0:>10,} rows/s, peak RSS {result['peak_rss_mb']} MB")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "insert_backend": "mongodb" if args.mongo_uri else "mongomock",
+        "benchmarks": results
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved results to {output}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -19,14 +19,23 @@ if not uri:
     print("Warning: MONGODB_URI environment variable not set. Using mock data for development.")
     uri = "mongodb://localhost:27017"
 
-# Create a simple client with minimal configuration
-client = MongoClient(uri, server_api=ServerApi('1'))
+# Connection pool sizing, shared by the sync and async clients
+client_options = {
+    "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+}
 
-# Send a ping to confirm a successful connection
-try:
-    client.admin.command('ping')
-    print("Pinged your deployment. You successfully connected to MongoDB!")
-except Exception as e:
-    print(f"MongoDB connection error: {str(e)}")
-    print("Using mock data for development")
+_client = None
+
+def get_client() -> MongoClient:
+    """Return the shared synchronous client, created on first use.
 
+    Nothing connects at import time: the client connects in the background
+    once it exists, and the first operation waits for it.
+    """
+    global _client
+    if _client is None:
+        _client = MongoClient(uri, server_api=ServerApi('1'), **client_options)
+    return _client
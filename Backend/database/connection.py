@@ -0,0 +1,44 @@
+from pymongo import AsyncMongoClient
+from pymongo.server_api import ServerApi
+import asyncio
+import os
+
+from configurations import uri, client_options
+from metrics import command_timer
+
+DATABASE_NAME = os.getenv("MONGODB_DATABASE", "Amba")
+# How long the readiness check waits for the deployment to answer
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+# Shared non-blocking client for the API. Every route awaits its queries
+# through this client so a slow query never stalls the event loop. It is
+# created on first use; constructing it does not contact the server.
+_async_client = None
+
+def get_client() -> AsyncMongoClient:
+    """Return the shared async client, creating it on first use"""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(
+            uri, server_api=ServerApi('1'), event_listeners=[command_timer], **client_options
+        )
+    return _async_client
+
+def get_db():
+    """Return the async handle for the application database."""
+    return get_client()[DATABASE_NAME]
+
+async def ping() -> bool:
+    """True when the deployment answers a ping within the readiness timeout"""
+    try:
+        await asyncio.wait_for(get_client().admin.command("ping"), READINESS_TIMEOUT_SECONDS)
+        return True
+    except Exception:
+        return False
+
+async def close_client():
+    """Close the shared client, if one was created"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+import os
+import time
+
+IMPORT_STATE_ID = "import_state"
+
+def bump_import_generation(db, export_date: datetime, session=None, class_id: Optional[str] = None):
+    """Record that an import finished so cached API results get refreshed"""
+    db.import_metadata.update_one(
+        {"_id": IMPORT_STATE_ID},
+        {
+            "$inc": {"generation": 1},
+            "$max": {"latest_export_date": export_date},
+            "$set": {"updated_at": datetime.utcnow(), **({"latest_class_id": class_id} if class_id else {})},
+            **({"$addToSet": {"class_ids": class_id}} if class_id else {})
+        },
+        upsert=True,
+        session=session
+    )
+
+class ImportStateTracker:
+    """Remembers the import metadata document, re-reading it at most every few seconds"""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._state = {"generation": 0, "latest_export_date": None, "latest_class_id": None, "class_ids": []}
+        self._checked_at: Optional[float] = None
+
+    @property
+    def generation(self) -> int:
+        """Generation seen by the most recent refresh"""
+        return self._state["generation"]
+
+    async def current(self, db) -> dict:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.refresh_seconds:
+            document = await db.import_metadata.find_one({"_id": IMPORT_STATE_ID})
+            self._state = {
+                "generation": document.get("generation", 0) if document else 0,
+                "latest_export_date": document.get("latest_export_date") if document else None,
+                "latest_class_id": document.get("latest_class_id") if document else None,
+                "class_ids": document.get("class_ids", []) if document else []
+            }
+            self._checked_at = now
+        return self._state
+
+import_state = ImportStateTracker(float(os.getenv("IMPORT_STATE_REFRESH_SECONDS", "5")))
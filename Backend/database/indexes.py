@@ -0,0 +1,68 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Every index the importer and API rely on, by collection. Every query is
+# scoped to one class, so class_id leads each one. scripts/check_query_plans.py
+# explains every query against these and fails on a collection scan or an
+# in-memory sort, so add the index here together with any new query shape.
+INDEXES = {
+    "assignment_completions": [
+        # Natural key the importer upserts on; also serves per-date reads,
+        # rebuilding the previous snapshot and deleting stale rows
+        IndexModel(
+            [("class_id", ASCENDING), ("export_date", ASCENDING), ("student_name", ASCENDING),
+             ("assignment_name", ASCENDING), ("occurrence", ASCENDING)],
+            unique=True
+        ),
+        # A student's or type's changes over a date range, and as_of rebuilds
+        IndexModel([("class_id", ASCENDING), ("student_name", ASCENDING), ("export_date", DESCENDING)]),
+        IndexModel([("class_id", ASCENDING), ("assignment_type", ASCENDING), ("export_date", DESCENDING)]),
+        # Keyset pagination walks each filter in _id order
+        IndexModel([("class_id", ASCENDING), ("student_name", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("class_id", ASCENDING), ("assignment_type", ASCENDING), ("_id", ASCENDING)])
+    ],
+    "student_daily_stats": [
+        # One row per student and export; also the date-ordered rollup and recompute passes
+        IndexModel([("class_id", ASCENDING), ("export_date", ASCENDING), ("student_name", ASCENDING)], unique=True),
+        # A student's history, and each student's latest totals before a date
+        IndexModel([("class_id", ASCENDING), ("student_name", ASCENDING), ("export_date", DESCENDING)])
+    ],
+    "daily_overall_stats": [
+        IndexModel([("class_id", ASCENDING), ("export_date", ASCENDING)], unique=True)
+    ],
+    "current_rankings": [
+        IndexModel([("class_id", ASCENDING), ("student_name", ASCENDING)], unique=True),
+        IndexModel([("class_id", ASCENDING), ("rank_by_mastery", ASCENDING)]),
+        IndexModel([("class_id", ASCENDING), ("rank_by_perseverance", ASCENDING)]),
+        # Which export the leaderboard reflects, and dropping students no longer in it
+        IndexModel([("class_id", ASCENDING), ("export_date", DESCENDING)])
+    ],
+    "students": [
+        IndexModel([("class_id", ASCENDING), ("student_name", ASCENDING)], unique=True),
+        # Case-insensitive prefix search and paging
+        IndexModel([("class_id", ASCENDING), ("search_name", ASCENDING)])
+    ],
+    "student_rollups": [
+        IndexModel(
+            [("class_id", ASCENDING), ("period", ASCENDING), ("student_name", ASCENDING), ("period_start", ASCENDING)],
+            unique=True
+        ),
+        # Replacing every student's periods from a date onwards
+        IndexModel([("class_id", ASCENDING), ("period", ASCENDING), ("period_start", ASCENDING)])
+    ],
+    "class_rollups": [
+        IndexModel([("class_id", ASCENDING), ("period", ASCENDING), ("period_start", ASCENDING)], unique=True)
+    ],
+    "import_manifest": [
+        IndexModel([("status", ASCENDING)])
+    ]
+}
+
+def ensure_indexes(db):
+    """Create every index in INDEXES; ones that already exist are left alone"""
+    for collection, indexes in INDEXES.items():
+        db[collection].create_indexes(indexes)
+
+async def ensure_indexes_async(db):
+    """ensure_indexes through the API's async client"""
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
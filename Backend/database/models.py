@@ -63,6 +63,7 @@ class OverallProgress(MongoBaseModel):
 
 class StudentDailyStats(MongoBaseModel):
     """Daily statistics for each student"""
+    class_id: Optional[str] = None
     export_date: datetime
     student_name: str
     daily_mastery_points: int
@@ -74,7 +75,13 @@ class StudentDailyStats(MongoBaseModel):
     rank_by_perseverance: int
 
 class AssignmentCompletion(MongoBaseModel):
-    """Detailed record of each assignment completion"""
+    """Detailed record of each assignment completion.
+
+    Only rows that are new or changed since the previous export are stored;
+    `occurrence` tells apart repeats of the same assignment for one student
+    and `removed` marks a row that disappeared from the export.
+    """
+    class_id: Optional[str] = None
     export_date: datetime
     student_name: str
     assignment_name: str
@@ -84,9 +91,12 @@ class AssignmentCompletion(MongoBaseModel):
     number_of_attempts: int
     mastery_achieved: bool
     perseverance_points: float
+    occurrence: int = 0
+    removed: Optional[bool] = None
 
 class DailyOverallStats(MongoBaseModel):
-    """Daily aggregated statistics across all students"""
+    """Daily aggregated statistics across all students of a class"""
+    class_id: Optional[str] = None
     export_date: datetime
     total_mastery_points: int
     total_perseverance_points: float
@@ -0,0 +1,14 @@
+def patch_bulk_sort(set_attribute=setattr):
+    """Let mongomock run the importer's bulk writes, for the tests and the insert benchmark.
+
+    mongomock's bulk builder predates the `sort` option pymongo now passes
+    along, so it is dropped. Pass monkeypatch.setattr as `set_attribute`
+    to have the patch undone after a test.
+    """
+    import mongomock.collection
+    for name in ("add_replace", "add_update"):
+        original = getattr(mongomock.collection.BulkOperationBuilder, name)
+        def without_sort(self, *args, _original=original, **kwargs):
+            kwargs.pop("sort", None)
+            return _original(self, *args, **kwargs)
+        set_attribute(mongomock.collection.BulkOperationBuilder, name, without_sort)
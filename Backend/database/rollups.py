@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+import os
+import pymongo
+
+# Periods the importer keeps pre-aggregated
+ROLLUP_PERIODS = ("week", "month")
+
+# Rollups replaced per bulk_write round trip, as the importer batches its rows
+WRITE_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+
+STUDENT_FIELDS = {
+    "export_date": 1,
+    "student_name": 1,
+    "daily_mastery_points": 1,
+    "daily_perseverance_points": 1,
+    "total_mastery_points": 1,
+    "total_perseverance_points": 1,
+    "course_challenges_passed": 1,
+    "rank_by_mastery": 1,
+    "rank_by_perseverance": 1,
+    "_id": 0
+}
+
+OVERALL_FIELDS = {
+    "export_date": 1,
+    "total_mastery_points": 1,
+    "total_perseverance_points": 1,
+    "total_course_challenges_passed": 1,
+    "average_mastery_points": 1,
+    "average_perseverance_points": 1,
+    "_id": 0
+}
+
+def period_start(export_date: datetime, period: str) -> datetime:
+    """First day of the week (Monday) or month holding export_date, as $dateTrunc would give"""
+    day = export_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def new_rollup(class_id: str, period: str, start: datetime, doc: dict) -> dict:
+    return {
+        "class_id": class_id,
+        "period": period,
+        "period_start": start,
+        "first_export_date": doc["export_date"],
+        "days": 0
+    }
+
+def add_student_day(rollup: dict, doc: dict):
+    """Fold one student_daily_stats row into its period, rows arriving in date order"""
+    rollup["days"] += 1
+    rollup["last_export_date"] = doc["export_date"]
+    # The daily points are what each export added to the running totals
+    rollup["mastery_points_gained"] = rollup.get("mastery_points_gained", 0) + doc["daily_mastery_points"]
+    rollup["perseverance_points_gained"] = rollup.get("perseverance_points_gained", 0) + doc["daily_perseverance_points"]
+    for field in ("total_mastery_points", "total_perseverance_points", "course_challenges_passed",
+                  "rank_by_mastery", "rank_by_perseverance"):
+        rollup[field] = doc[field]
+
+def add_overall_day(rollup: dict, doc: dict):
+    """Fold one daily_overall_stats row into its period, rows arriving in date order"""
+    rollup["days"] += 1
+    rollup["last_export_date"] = doc["export_date"]
+    rollup["mastery_points_gained"] = rollup.get("mastery_points_gained", 0) + doc["total_mastery_points"]
+    rollup["perseverance_points_gained"] = rollup.get("perseverance_points_gained", 0) + doc["total_perseverance_points"]
+    rollup["course_challenges_passed"] = doc["total_course_challenges_passed"]
+    # Mean of the daily class averages over the period
+    for field in ("average_mastery_points", "average_perseverance_points"):
+        total = rollup.get(f"_{field}_sum", 0) + doc[field]
+        rollup[f"_{field}_sum"] = total
+        rollup[field] = total / rollup["days"]
+
+def refresh_rollups(db, class_id: str, export_date: datetime, session=None):
+    """Rebuild the class's weekly and monthly rollups touched by importing export_date.
+
+    Only periods from the one holding export_date onwards are rebuilt: for a
+    new latest export that is just its current week and month, while a late
+    or replaced export also refreshes the later periods whose totals moved.
+    Returns the number of rollup documents written.
+    """
+    written = 0
+    for period in ROLLUP_PERIODS:
+        start = period_start(export_date, period)
+        refresh_id = ObjectId()
+
+        since = {"class_id": class_id, "export_date": {"$gte": start}}
+        students = {}
+        for doc in db.student_daily_stats.find(since, STUDENT_FIELDS, session=session).sort("export_date", 1):
+            key = (period_start(doc["export_date"], period), doc["student_name"])
+            if key not in students:
+                students[key] = {**new_rollup(class_id, period, key[0], doc), "student_name": doc["student_name"]}
+            add_student_day(students[key], doc)
+
+        overall = {}
+        for doc in db.daily_overall_stats.find(since, OVERALL_FIELDS, session=session).sort("export_date", 1):
+            key = period_start(doc["export_date"], period)
+            if key not in overall:
+                overall[key] = new_rollup(class_id, period, key, doc)
+            add_overall_day(overall[key], doc)
+
+        for collection, rollups, key_fields in (
+            (db.student_rollups, students.values(), ("class_id", "period", "period_start", "student_name")),
+            (db.class_rollups, overall.values(), ("class_id", "period", "period_start"))
+        ):
+            requests = [
+                pymongo.ReplaceOne(
+                    {field: rollup[field] for field in key_fields},
+                    {**{k: v for k, v in rollup.items() if not k.startswith("_")}, "refresh_id": refresh_id},
+                    upsert=True
+                )
+                for rollup in rollups
+            ]
+            for i in range(0, len(requests), WRITE_BATCH_SIZE):
+                collection.bulk_write(requests[i:i + WRITE_BATCH_SIZE], ordered=False, session=session)
+            # Periods or students that no longer have any exports
+            collection.delete_many(
+                {"class_id": class_id, "period": period, "period_start": {"$gte": start}, "refresh_id": {"$ne": refresh_id}},
+                session=session
+            )
+            written += len(requests)
+    return written
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable
 from .models import (
     AssignmentCompletion, 
     StudentDailyStats, 
@@ -29,16 +29,23 @@ def compute_points(row: Dict) -> Dict:
         "perseverance_points": number_of_attempts
     }
 
-def process_daily_data(csv_data: List[Dict], export_date: datetime):
-    """Process CSV data and return structured data for database insertion"""
-    student_stats = {}
-    assignments = []
+# Assignment types that are recorded but never earn points
+UNSCORED_TYPES = ["Video", "Article"]
+
+def iter_assignment_records(csv_rows: Iterable[Dict], export_date: datetime, student_stats: Dict):
+    """Lazily score CSV rows into assignment completion documents.
+
+    Per-student totals are accumulated into `student_stats` as rows go by,
+    so the caller only has the whole picture once the generator is exhausted.
+    """
+    # Some assignments are set more than once; number the repeats per student
+    occurrences = {}
     
-    for row in csv_data:
-        # Debug each row's assignment name
-        assignment_name = row.get("Assignment Name", "").strip()
-        student_name = row.get("Student Name", "").strip()
-        assignment_type = row.get("Assignment Type", "").strip()
+    for row in csv_rows:
+        # Cells missing from a short line come through as None
+        assignment_name = (row.get("Assignment Name") or "").strip()
+        student_name = (row.get("Student Name") or "").strip()
+        assignment_type = (row.get("Assignment Type") or "").strip()
         
         if not student_name:
             continue
@@ -51,43 +58,53 @@ def process_daily_data(csv_data: List[Dict], export_date: datetime):
             attempts = int(row.get("Number Of Attempts", 0) or 0)
             
             # Calculate points only for exercises and challenges
-            points = compute_points(row) if assignment_type not in ["Video", "Article"] else {
+            points = compute_points(row) if assignment_type not in UNSCORED_TYPES else {
                 "mastery_achieved": False,
                 "perseverance_points": 0
             }
-            
-            assignment = AssignmentCompletion(
-                export_date=export_date,
-                student_name=student_name,
-                assignment_name=assignment_name,
-                assignment_type=assignment_type,
-                points_possible=points_possible,
-                score_best=score_best,
-                number_of_attempts=attempts,
-                mastery_achieved=points["mastery_achieved"],
-                perseverance_points=points["perseverance_points"]
-            )
-            assignments.append(assignment)
-            
-            # Only update stats for exercises and challenges
-            if assignment_type not in ["Video", "Article"]:
-                if student_name not in student_stats:
-                    student_stats[student_name] = {
-                        "mastery_points": 0,
-                        "perseverance_points": 0,
-                        "course_challenges": 0
-                    }
-                
-                stats = student_stats[student_name]
-                stats["mastery_points"] += points["mastery_achieved"]
-                stats["perseverance_points"] += points["perseverance_points"]
-                if assignment_type == "Course Challenge" and points["mastery_achieved"]:
-                    stats["course_challenges"] += 1
-                    
         except Exception as e:
             print(f"Error processing row: {row}")
             print(f"Error details: {str(e)}")
             continue
-    
-    return assignments, student_stats
+        
+        # Only update stats for exercises and challenges
+        if assignment_type not in UNSCORED_TYPES:
+            if student_name not in student_stats:
+                student_stats[student_name] = {
+                    "mastery_points": 0,
+                    "perseverance_points": 0,
+                    "course_challenges": 0
+                }
+            
+            stats = student_stats[student_name]
+            stats["mastery_points"] += points["mastery_achieved"]
+            stats["perseverance_points"] += points["perseverance_points"]
+            if assignment_type == "Course Challenge" and points["mastery_achieved"]:
+                stats["course_challenges"] += 1
+        
+        pair = (student_name, assignment_name)
+        occurrence = occurrences.get(pair, 0)
+        occurrences[pair] = occurrence + 1
+        
+        # Same shape as AssignmentCompletion.model_dump(), without the validation cost
+        yield {
+            "export_date": export_date,
+            "student_name": student_name,
+            "assignment_name": assignment_name,
+            "assignment_type": assignment_type,
+            "points_possible": points_possible,
+            "score_best": score_best,
+            "number_of_attempts": attempts,
+            "mastery_achieved": points["mastery_achieved"],
+            "perseverance_points": float(points["perseverance_points"]),
+            "occurrence": occurrence
+        }
 
+def process_daily_data(csv_data: List[Dict], export_date: datetime):
+    """Process CSV data and return structured data for database insertion"""
+    student_stats = {}
+    assignments = [
+        AssignmentCompletion(**record)
+        for record in iter_assignment_records(csv_data, export_date, student_stats)
+    ]
+    return assignments, student_stats
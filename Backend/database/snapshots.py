@@ -0,0 +1,21 @@
+def latest_rows_pipeline(match: dict) -> list:
+    """Latest stored row per assignment among the matched changes, tombstones dropped.
+
+    Only new, changed or removed rows are stored per export, so this is how
+    the assignment state on a date is rebuilt: the API's as_of reads and the
+    importer's change detection both go through it.
+    """
+    return [
+        {"$match": match},
+        {"$sort": {"export_date": -1}},
+        {"$group": {
+            "_id": {
+                "student_name": "$student_name",
+                "assignment_name": "$assignment_name",
+                "occurrence": {"$ifNull": ["$occurrence", 0]}
+            },
+            "doc": {"$first": "$$ROOT"}
+        }},
+        {"$replaceRoot": {"newRoot": "$doc"}},
+        {"$match": {"removed": {"$ne": True}}}
+    ]
@@ -1,8 +1,17 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from routes.khan_data import router as khan_router
-from configurations import client
+from routes.imports import router as imports_router
+from routes.conditional import conditional_get
+from metrics import record_metrics, render_metrics
+from database.connection import close_client, get_client, get_db, ping
+from database.indexes import ensure_indexes_async
+from contextlib import asynccontextmanager
+import asyncio
 import logging
+import os
 import uvicorn
 
 
@@ -10,7 +19,33 @@ import uvicorn
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Apply database/indexes.py when the API starts, besides scripts/create_indexes.py
+CREATE_INDEXES_ON_STARTUP = os.getenv("CREATE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+async def create_indexes():
+    """Create any missing index; the server may still be starting, so only log failures"""
+    try:
+        await ensure_indexes_async(get_db())
+        logger.info("Indexes are in place")
+    except Exception as e:
+        logger.warning(f"Could not create indexes: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared client on startup without waiting for the server, close it on shutdown"""
+    get_client()
+    # Runs in the background so startup and liveness never wait on the database
+    indexes = asyncio.create_task(create_indexes()) if CREATE_INDEXES_ON_STARTUP else None
+    yield
+    if indexes is not None:
+        indexes.cancel()
+    await close_client()
+
+app = FastAPI(lifespan=lifespan)
+
+# Answer repeat dashboard polls with 304 Not Modified until new data is imported.
+# Registered first so CORS (added later, so further out) still decorates the 304s.
+app.middleware("http")(conditional_get)
 
 # Add CORS middleware with more permissive settings
 app.add_middleware(
@@ -19,23 +54,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
-# Add middleware to log all requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Request: {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
-    return response
+# Compress large JSON bodies for clients that accept gzip; a low level keeps
+# the CPU cost well below what the smaller transfer saves on big payloads
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Per-route latency, status and response size, exported at /metrics.
+# Registered last so it is the outermost middleware and times everything.
+app.middleware("http")(record_metrics)
 
 # Include router with the full prefix
 app.include_router(khan_router, prefix="/api/khan", tags=["khan"])
+app.include_router(imports_router, prefix="/api/khan")
 
 @app.get("/")
 async def root():
     return {"message": "Khan Academy Data API"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; never touches the database"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Ready for traffic once MongoDB answers a ping"""
+    if await ping():
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "unavailable", "detail": "MongoDB is not reachable"})
+
 @app.get("/api-test")
 async def api_test():
     """Simple test endpoint at the app level"""
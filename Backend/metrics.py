@@ -0,0 +1,162 @@
+from fastapi import Request
+from collections import defaultdict
+from pymongo import monitoring
+import threading
+import time
+
+# Upper bounds, in seconds and bytes, of the histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram, one series per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                pairs = format_labels(self.label_names, labels)
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts + [count]):
+                    lines.append(f'{self.name}_bucket{{{pairs},le="{bound}"}} {bucket_count}')
+                lines.append(f"{self.name}_sum{{{pairs}}} {total}")
+                lines.append(f"{self.name}_count{{{pairs}}} {count}")
+        return lines
+
+class Counter:
+    """Monotonic counter, one series per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple):
+        with self._lock:
+            self._series[labels] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{{{format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple) -> str:
+    """Render name="value" pairs for a series"""
+    return ",".join(f'{name}="{escaped}"' for name, escaped in zip(names, map(escape_label, values)))
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time to first response byte, by route template",
+    ("method", "route"), LATENCY_BUCKETS
+)
+response_size = Histogram(
+    "http_response_size_bytes", "Response body size, by route template",
+    ("method", "route"), SIZE_BUCKETS
+)
+requests_total = Counter("http_requests_total", "Requests served, by status code", ("method", "route", "status"))
+command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trips, by collection and operation",
+    ("collection", "command"), LATENCY_BUCKETS
+)
+command_failures = Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error",
+    ("collection", "command")
+)
+in_flight = 0
+
+def route_template(request: Request) -> str:
+    """The matched route's path template, so /student/{student_name} is one series"""
+    route = request.scope.get("route")
+    if route is None:
+        # Responses from middleware (304s, 404s) never reached the router
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match.name == "FULL":
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+async def record_metrics(request: Request, call_next):
+    """Time every request and count its response size"""
+    global in_flight
+    in_flight += 1
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        requests_total.inc((request.method, route_template(request), "500"))
+        raise
+    finally:
+        in_flight -= 1
+    labels = (request.method, route_template(request))
+    request_duration.observe(labels, time.perf_counter() - start)
+    requests_total.inc(labels + (str(response.status_code),))
+
+    # Count bytes as they are sent, so streamed responses are measured too
+    body = response.body_iterator
+    async def counted_body():
+        size = 0
+        try:
+            async for chunk in body:
+                size += len(chunk)
+                yield chunk
+        finally:
+            response_size.observe(labels, size)
+    response.body_iterator = counted_body()
+    return response
+
+class CommandTimer(monitoring.CommandListener):
+    """Feeds the duration of every MongoDB command into the command histograms"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        # getMore names the cursor id first; its collection is a separate field
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._pending[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        command_duration.observe((collection, event.command_name), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        command_duration.observe((collection, event.command_name), event.duration_micros / 1e6)
+        command_failures.inc((collection, event.command_name))
+
+command_timer = CommandTimer()
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines = ["# HELP http_requests_in_flight Requests currently being served",
+             "# TYPE http_requests_in_flight gauge",
+             f"http_requests_in_flight {in_flight}"]
+    for metric in (request_duration, response_size, requests_total, command_duration, command_failures):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+import os
+
+from database.connection import get_db
+from database.import_state import import_state
+
+class ResponseCache:
+    """Size-bounded LRU cache of query results, valid for a single import generation"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: tuple, loader):
+        """Return the cached result for key, or await loader() and remember it"""
+        state = await import_state.current(get_db())
+        generation = state["generation"]
+        
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        value = await loader()
+        self._entries[key] = (generation, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "generation": import_state.generation
+        }
+
+response_cache = ResponseCache(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")))
@@ -0,0 +1,47 @@
+from fastapi import Request, Response
+from email.utils import format_datetime
+from datetime import timezone
+import hashlib
+
+from database.connection import get_db
+from database.import_state import import_state
+
+API_PREFIX = "/api/khan"
+# Operational endpoints whose answers change without a new import
+UNCACHEABLE_PREFIXES = ("/api/khan/cache", "/api/khan/test", "/api/khan/imports")
+
+def build_etag(state: dict, request: Request) -> str:
+    """Weak validator for a response: import generation plus the exact query"""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(
+        f"{state['generation']}|{state['latest_export_date']}|{request.url.path}|{query}".encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+async def conditional_get(request: Request, call_next):
+    """Answer repeat GETs with 304 before any query runs, and tag fresh ones"""
+    path = request.url.path
+    if request.method != "GET" or not path.startswith(API_PREFIX) or path.startswith(UNCACHEABLE_PREFIXES):
+        return await call_next(request)
+    
+    state = await import_state.current(get_db())
+    etag = build_etag(state, request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if state["latest_export_date"]:
+        headers["Last-Modified"] = format_datetime(
+            state["latest_export_date"].replace(tzinfo=timezone.utc), usegmt=True
+        )
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
@@ -0,0 +1,42 @@
+from fastapi.responses import Response
+from bson import ObjectId
+from datetime import datetime
+import json
+
+# orjson encodes datetimes natively and several times faster; fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def encode_value(value):
+    """JSON fallback for the BSON types stored in our collections"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """Encode raw MongoDB documents straight to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=encode_value)
+    return json.dumps(content, default=encode_value, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    """JSON response that skips response_model validation.
+
+    Returning a Response from an endpoint bypasses FastAPI's per-document
+    Pydantic pass, so the query's projection has to produce the documented
+    shape itself. Content that is already encoded bytes is sent as is.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+async def encode_cursor(cursor) -> bytes:
+    """Read a cursor to the end and encode the documents, e.g. to cache the bytes"""
+    return dumps(await cursor.to_list(None))
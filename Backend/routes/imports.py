@@ -0,0 +1,156 @@
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from pydantic import BaseModel
+from typing import List, Optional
+import os
+import queue
+import shutil
+import threading
+import uuid
+
+from scripts.import_khan_csv import CSV_DIR, import_file, parse_class_from_filename, parse_date_from_filename
+
+# Uploads land next to the exports imported by hand, so the CLI sees them too
+UPLOAD_DIR = Path(os.getenv("IMPORT_UPLOAD_DIR", str(CSV_DIR)))
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Finished jobs kept around for the status endpoint
+MAX_FINISHED_JOBS = int(os.getenv("IMPORT_JOBS_HISTORY", "100"))
+
+router = APIRouter(tags=["Imports"])
+
+class ImportJob(BaseModel):
+    job_id: str
+    filename: str
+    class_id: str
+    export_date: datetime
+    status: str = "queued"  # queued, running, complete, skipped or failed
+    total_rows: int = 0
+    rows_processed: int = 0
+    records_written: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ImportQueue:
+    """Runs uploaded exports through the importer one at a time on a worker thread.
+
+    A single worker keeps dates from being written concurrently, and since
+    the importer uses its own synchronous client the event loop keeps
+    serving reads while a file is ingested.
+    """
+
+    def __init__(self, max_finished: int):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, path: Path, export_date: datetime) -> ImportJob:
+        job = ImportJob(
+            job_id=uuid.uuid4().hex,
+            filename=path.name,
+            class_id=parse_class_from_filename(path),
+            export_date=export_date,
+            created_at=datetime.utcnow()
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="import-worker", daemon=True)
+                self._worker.start()
+        self._pending.put((job, path))
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job is not None else None
+
+    def recent(self) -> List[ImportJob]:
+        with self._lock:
+            return [job.model_copy() for job in reversed(self._jobs.values())]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _update(self, job: ImportJob, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def _run(self):
+        while True:
+            job, path = self._pending.get()
+            try:
+                with open(path, 'rb') as f:
+                    total_rows = max(sum(1 for _ in f) - 1, 0)
+                self._update(job, status="running", total_rows=total_rows, started_at=datetime.utcnow())
+                written = import_file(path, on_progress=lambda count: self._update(job, rows_processed=count))
+                if written is None:
+                    self._update(job, status="skipped", rows_processed=total_rows)
+                else:
+                    self._update(job, status="complete", records_written=written)
+            except Exception as e:
+                print(f"Error importing {path.name}: {str(e)}")
+                self._update(job, status="failed", error=str(e))
+            finally:
+                self._update(job, finished_at=datetime.utcnow())
+                self._pending.task_done()
+
+import_queue = ImportQueue(MAX_FINISHED_JOBS)
+
+def save_upload(upload: UploadFile, destination: Path):
+    """Copy the upload to disk in chunks, then move it into place atomically"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+    try:
+        with open(partial, 'wb') as out:
+            shutil.copyfileobj(upload.file, out, UPLOAD_CHUNK_SIZE)
+        os.replace(partial, destination)
+    finally:
+        partial.unlink(missing_ok=True)
+
+@router.post("/imports", response_model=ImportJob, status_code=202)
+async def upload_export(file: UploadFile = File(...)):
+    """Queue an uploaded Khan Academy export for import"""
+    filename = Path(file.filename or "").name
+    if not filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Upload a .csv export")
+    try:
+        export_date = parse_date_from_filename(Path(filename))
+    except (IndexError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail="Keep the export's original file name, e.g. '... Downloaded 2025.02.14 - ....csv'"
+        )
+
+    destination = UPLOAD_DIR / filename
+    try:
+        await run_in_threadpool(save_upload, file, destination)
+    except Exception as e:
+        print(f"Error saving upload {filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+    return import_queue.submit(destination, export_date)
+
+@router.get("/imports", response_model=List[ImportJob])
+async def list_import_jobs():
+    """Recent and pending import jobs, newest first"""
+    return import_queue.recent()
+
+@router.get("/imports/{job_id}", response_model=ImportJob)
+async def get_import_job(job_id: str):
+    """Status and progress of one import job"""
+    job = import_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No import job {job_id}")
+    return job
@@ -1,7 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
-from configurations import client
+import os
+import re
+from database.connection import get_db
+from database.import_state import import_state
+from database.snapshots import latest_rows_pipeline
+from routes.cache import response_cache
+from routes.fast_json import FastJSONResponse, dumps, encode_cursor
+from routes.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    STREAM_BATCH_SIZE,
+    fetch_page,
+    keyset_filter,
+    page_response,
+    stream_cursor,
+    stream_documents
+)
 from database.models import (
     AssignmentCompletion, 
     StudentDailyStats, 
@@ -15,6 +32,27 @@ from pydantic import BaseModel
 
 router = APIRouter(tags=["Khan Academy Data"])
 
+# Class served when a request names none; the importer's DEFAULT_CLASS_ID is a different setting
+API_DEFAULT_CLASS_ID = os.getenv("API_DEFAULT_CLASS_ID")
+
+async def resolve_class_id(class_id: Optional[str] = None) -> str:
+    """The class a request reads: ?class_id=, else API_DEFAULT_CLASS_ID, else the
+    only class imported. With several classes and no default, class_id is required.
+    """
+    if class_id:
+        return class_id
+    if API_DEFAULT_CLASS_ID:
+        return API_DEFAULT_CLASS_ID
+    state = await import_state.current(get_db())
+    # Databases imported before class_ids was tracked hold a single class
+    class_ids = state["class_ids"] or [state["latest_class_id"] or "default"]
+    if len(class_ids) > 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Several classes are imported; pass class_id (one of {', '.join(sorted(class_ids))})"
+        )
+    return class_ids[0]
+
 # Response Models
 class StudentName(BaseModel):
     student_name: str
@@ -31,213 +69,487 @@ class DailyChangeResponse(BaseModel):
     daily_mastery_points: int
 
 @router.get("/students", response_model=List[StudentName])
-async def get_all_students():
-    """Get all student names."""
+async def get_all_students(
+    response: Response,
+    prefix: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get student names from the roster, optionally filtered by a name prefix.
+
+    Results are ordered case-insensitively; when `limit` is set and the page
+    is full, pass the X-Next-Cursor header back as `after`.
+    """
     try:
-        # Get distinct student names and convert ObjectId to string
-        cursor = client.Amba.student_daily_stats.find(
-            {},
-            {"student_name": 1, "_id": 0}
-        )
+        query = {"class_id": class_id}
+        if prefix:
+            query["search_name"] = {"$regex": "^" + re.escape(prefix.lower())}
+        if after:
+            query.setdefault("search_name", {})["$gt"] = after.lower()
         
-        # Get unique student names using a set
-        student_names = set()
-        for doc in cursor:
-            student_names.add(doc["student_name"])
+        cursor = get_db().students.find(
+            query,
+            {"student_name": 1, "search_name": 1, "_id": 0}
+        ).sort("search_name", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        documents = await cursor.to_list(None)
         
-        # Convert to list of StudentName objects
-        return [{"student_name": name} for name in sorted(student_names)]
+        if limit and len(documents) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = documents[-1]["search_name"]
+        return [{"student_name": doc["student_name"]} for doc in documents]
     except Exception as e:
         print(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk reads return FastJSONResponse, so response_model only documents the
+# shape; these projections drop the stored fields that are not part of it
+ASSIGNMENT_PROJECTION = {"import_id": 0}
+STATS_PROJECTION = {"_id": 0, "import_id": 0}
+
+def latest_assignments_pipeline(match: dict) -> list:
+    """Latest stored row per assignment among the matched changes, in assignment order"""
+    return latest_rows_pipeline(match) + [{"$sort": {"student_name": 1, "assignment_name": 1, "occurrence": 1}}]
+
+def after_assignment_filter(last: dict) -> dict:
+    """Match the assignments that sort after `last` in as_of order"""
+    student_name, assignment_name = last["student_name"], last["assignment_name"]
+    return {"$or": [
+        {"student_name": {"$gt": student_name}},
+        {"student_name": student_name, "assignment_name": {"$gt": assignment_name}},
+        {"student_name": student_name, "assignment_name": assignment_name,
+         "occurrence": {"$gt": last.get("occurrence", 0)}}
+    ]}
+
+def assignments_as_of_pipeline(query: dict, as_of: datetime, last: dict = None, limit: int = None) -> list:
+    """Assignment rows as they stood on as_of, after the `last` row and at most `limit` of them"""
+    match = {**query, "export_date": {"$lte": as_of}}
+    # The group key is the sort key, so earlier pages' assignments are skipped before grouping
+    if last:
+        match.update(after_assignment_filter(last))
+    pipeline = latest_assignments_pipeline(match)
+    if limit:
+        pipeline.append({"$limit": limit})
+    return pipeline + [{"$project": ASSIGNMENT_PROJECTION}]
+
+async def read_assignments_as_of(query: dict, as_of: datetime, after: str, limit: int, stream: bool):
+    """Rebuild assignment rows as they stood on as_of from the stored changes, a page at a time"""
+    collection = get_db().assignment_completions
+    last = None
+    if after:
+        # The cursor is the _id of the previous page's last row, which carries its sort key
+        last = await collection.find_one(
+            keyset_filter({}, after), {"student_name": 1, "assignment_name": 1, "occurrence": 1}
+        )
+        if last is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if stream:
+        pipeline = assignments_as_of_pipeline(query, as_of, last)
+        return stream_cursor(await collection.aggregate(pipeline, allowDiskUse=True, batchSize=STREAM_BATCH_SIZE))
+    cursor = await collection.aggregate(assignments_as_of_pipeline(query, as_of, last, limit), allowDiskUse=True)
+    return page_response(await cursor.to_list(None), limit)
+
 @router.get("/student/{student_name}", response_model=List[AssignmentCompletion])
-async def get_student_progress(student_name: str):
-    """Get all assignments for a specific student."""
+async def get_student_progress(
+    student_name: str,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    as_of: Optional[datetime] = None,
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get assignment changes for a specific student, one keyset page at a time.
+
+    Only new or changed rows are stored per export. Pass `as_of` to get the
+    student's full assignment state on that date instead. Either way, pass
+    the X-Next-Cursor response header back as `after` to read the next page,
+    or set `stream=true` to receive every document as NDJSON.
+    """
     try:
-        documents = list(client.Amba.assignment_completions.find({"student_name": student_name}))
-        if not documents:
-            return []
-        return documents
+        query = {"class_id": class_id, "student_name": student_name}
+        if as_of:
+            return await read_assignments_as_of(query, as_of, after, limit, stream)
+        if stream:
+            return stream_documents(get_db().assignment_completions, query, after, ASSIGNMENT_PROJECTION)
+        return await fetch_page(get_db().assignment_completions, query, after, limit, ASSIGNMENT_PROJECTION)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/assignments/{assignment_type}", response_model=List[AssignmentCompletion])
-async def get_assignments_by_type(assignment_type: str):
-    """Get all assignments of a specific type."""
+async def get_assignments_by_type(
+    assignment_type: str,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    as_of: Optional[datetime] = None,
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get assignment changes of a specific type, like get_student_progress."""
     try:
-        documents = list(client.Amba.assignment_completions.find({"assignment_type": assignment_type}))
-        if not documents:
-            return []
-        return documents
+        query = {"class_id": class_id, "assignment_type": assignment_type}
+        if as_of:
+            return await read_assignments_as_of(query, as_of, after, limit, stream)
+        if stream:
+            return stream_documents(get_db().assignment_completions, query, after, ASSIGNMENT_PROJECTION)
+        return await fetch_page(get_db().assignment_completions, query, after, limit, ASSIGNMENT_PROJECTION)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Export dates are grouped into these periods with $dateTrunc
+Bucket = Literal["day", "week", "month"]
+
+def bucketed_series_pipeline(query: dict, bucket: str, fields: Dict[str, str]) -> list:
+    """Downsample a per-export series on the server to one point per period.
+
+    `fields` maps each field to the accumulator that folds its daily values
+    into the period's, the same way database/rollups.py does. Each point
+    also carries the date of the final export and how many exports fell
+    into the period.
+    """
+    period = {"date": "$export_date", "unit": bucket}
+    if bucket == "week":
+        period["startOfWeek"] = "monday"
+    return [
+        {"$match": query},
+        {"$sort": {"export_date": 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": period},
+            "export_date": {"$last": "$export_date"},
+            "days": {"$sum": 1},
+            **{field: {accumulator: f"${field}"} for field, accumulator in fields.items()}
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "period_start": "$_id", "export_date": 1, "days": 1, **{field: 1 for field in fields}}}
+    ]
+
+async def read_bucketed_series(collection, query: dict, bucket: str, fields: Dict[str, str]):
+    """Run bucketed_series_pipeline on a per-export series"""
+    cursor = await collection.aggregate(bucketed_series_pipeline(query, bucket, fields))
+    return FastJSONResponse(await cursor.to_list(None))
+
+# Points gained add up over a period; totals and ranks are the period's last
+STUDENT_SERIES_FIELDS = {
+    "daily_mastery_points": "$sum",
+    "daily_perseverance_points": "$sum",
+    "total_mastery_points": "$last",
+    "total_perseverance_points": "$last",
+    "course_challenges_passed": "$last",
+    "rank_by_mastery": "$last",
+    "rank_by_perseverance": "$last"
+}
+
 @router.get("/progress/{student_name}/date-range")
 async def get_student_progress_by_date(
     student_name: str,
     start_date: datetime,
-    end_date: datetime
+    end_date: datetime,
+    bucket: Optional[Bucket] = None,
+    class_id: str = Depends(resolve_class_id)
 ):
-    """Get student progress within a date range."""
+    """Get student progress within a date range.
+
+    Without `bucket`, returns the assignment changes stored for exports in
+    the range. With `bucket=day|week|month`, returns the student's daily
+    stats downsampled to one point per period instead.
+    """
     try:
-        documents = list(client.Amba.assignment_completions.find({
+        query = {
+            "class_id": class_id,
             "student_name": student_name,
-            "date": {
+            "export_date": {
                 "$gte": start_date,
                 "$lte": end_date
             }
-        }))
-        if not documents:
-            return []
-        return documents
+        }
+        if bucket:
+            return await read_bucketed_series(get_db().student_daily_stats, query, bucket, STUDENT_SERIES_FIELDS)
+        return FastJSONResponse(await get_db().assignment_completions.find(
+            query,
+            {"_id": 0, "import_id": 0}
+        ).sort("export_date", 1).to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 1. Current Rankings Endpoints
+RANKING_PROJECTION = {
+    "_id": 0,
+    "student_name": 1,
+    "total_mastery_points": 1,
+    "total_perseverance_points": 1,
+    "rank_by_mastery": 1,
+    "rank_by_perseverance": 1
+}
+
+async def read_current_rankings(class_id: str, rank_field: str, offset: int, limit: Optional[int]) -> bytes:
+    """Read a slice of the class's materialized leaderboard as an indexed range on rank_field"""
+    cursor = get_db().current_rankings.find(
+        {"class_id": class_id, rank_field: {"$gt": offset}},
+        RANKING_PROJECTION
+    ).sort(rank_field, 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await encode_cursor(cursor)
+
 @router.get("/rankings/current/mastery", response_model=List[RankingResponse])
-async def get_current_mastery_rankings():
-    """Get current mastery rankings for all students"""
+async def get_current_mastery_rankings(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get current mastery rankings, optionally as a top-N slice"""
     try:
-        # Get the latest date first
-        latest_date = client.Amba.student_daily_stats.find_one(
-            sort=[("export_date", -1)]
-        )["export_date"]
-        
-        # Get only the latest records for each student
-        pipeline = [
-            # Match only the latest date
-            {"$match": {"export_date": latest_date}},
-            # Sort by mastery points in descending order
-            {"$sort": {"total_mastery_points": -1}},
-            # Add array index as rank
-            {"$group": {
-                "_id": None,
-                "students": {"$push": "$$ROOT"}
-            }},
-            {"$unwind": {"path": "$students", "includeArrayIndex": "rank"}},
-            # Project final format
-            {"$project": {
-                "_id": 0,
-                "student_name": "$students.student_name",
-                "total_mastery_points": "$students.total_mastery_points",
-                "total_perseverance_points": "$students.total_perseverance_points",
-                "rank_by_mastery": {"$add": ["$rank", 1]},
-                "rank_by_perseverance": "$students.rank_by_perseverance"
-            }}
-        ]
-        
-        documents = list(client.Amba.student_daily_stats.aggregate(pipeline))
-        return documents
+        return FastJSONResponse(await response_cache.get_or_load(
+            ("rankings_mastery", class_id, offset, limit),
+            lambda: read_current_rankings(class_id, "rank_by_mastery", offset, limit)
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/rankings/current/perseverance", response_model=List[RankingResponse])
-async def get_current_perseverance_rankings():
-    """Get current perseverance rankings for all students"""
+async def get_current_perseverance_rankings(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get current perseverance rankings, optionally as a top-N slice"""
     try:
-        # Get the latest date first
-        latest_date = client.Amba.student_daily_stats.find_one(
-            sort=[("export_date", -1)]
-        )["export_date"]
-        
-        # Get only the latest records for each student
-        pipeline = [
-            # Match only the latest date
-            {"$match": {"export_date": latest_date}},
-            # Sort by perseverance points in descending order
-            {"$sort": {"total_perseverance_points": -1}},
-            # Add array index as rank
-            {"$group": {
-                "_id": None,
-                "students": {"$push": "$$ROOT"}
-            }},
-            {"$unwind": {"path": "$students", "includeArrayIndex": "rank"}},
-            # Project final format
-            {"$project": {
-                "_id": 0,
-                "student_name": "$students.student_name",
-                "total_mastery_points": "$students.total_mastery_points",
-                "total_perseverance_points": "$students.total_perseverance_points",
-                "rank_by_mastery": "$students.rank_by_mastery",
-                "rank_by_perseverance": {"$add": ["$rank", 1]}
-            }}
-        ]
-        
-        documents = list(client.Amba.student_daily_stats.aggregate(pipeline))
-        return documents
+        return FastJSONResponse(await response_cache.get_or_load(
+            ("rankings_perseverance", class_id, offset, limit),
+            lambda: read_current_rankings(class_id, "rank_by_perseverance", offset, limit)
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 2. Student Progress Over Time
 @router.get("/student/{student_name}/progress")
-async def get_student_progress_history(student_name: str):
+async def get_student_progress_history(student_name: str, class_id: str = Depends(resolve_class_id)):
     """Get a student's mastery and perseverance points over time"""
     try:
-        return list(client.Amba.student_daily_stats.find(
-            {"student_name": student_name}
-        ).sort("export_date", 1))
+        return FastJSONResponse(await response_cache.get_or_load(
+            ("student_progress", class_id, student_name),
+            lambda: encode_cursor(get_db().student_daily_stats.find(
+                {"class_id": class_id, "student_name": student_name},
+                STATS_PROJECTION
+            ).sort("export_date", 1))
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Student dashboard: everything one student's page shows, in one round trip
+DASHBOARD_HISTORY_FIELDS = {
+    "_id": 0,
+    "export_date": 1,
+    "total_mastery_points": 1,
+    "total_perseverance_points": 1,
+    "course_challenges_passed": 1,
+    "rank_by_mastery": 1,
+    "rank_by_perseverance": 1
+}
+DASHBOARD_CHANGE_FIELDS = {"_id": 0, "export_date": 1, "daily_mastery_points": 1, "daily_perseverance_points": 1}
+DASHBOARD_ASSIGNMENT_FIELDS = {
+    "_id": 0,
+    "export_date": 1,
+    "assignment_name": 1,
+    "assignment_type": 1,
+    "occurrence": 1,
+    "points_possible": 1,
+    "score_best": 1,
+    "number_of_attempts": 1,
+    "mastery_achieved": 1,
+    "perseverance_points": 1
+}
+DASHBOARD_RANK_FIELDS = {"_id": 0, "export_date": 1, "rank_by_mastery": 1, "rank_by_perseverance": 1}
+
+def student_dashboard_pipeline(class_id: str, student_name: str) -> list:
+    """One aggregation over the student's daily stats that also pulls in their
+    current assignment states and leaderboard entry.
+
+    Both lookups are uncorrelated, so each runs once on its own indexes
+    rather than once per daily row.
+    """
+    student = {"class_id": class_id, "student_name": student_name}
+    return [
+        {"$match": student},
+        {"$sort": {"export_date": 1}},
+        {"$facet": {
+            "history": [{"$project": DASHBOARD_HISTORY_FIELDS}],
+            "daily_changes": [{"$project": DASHBOARD_CHANGE_FIELDS}],
+            "assignments": [
+                {"$limit": 1},
+                {"$lookup": {
+                    "from": "assignment_completions",
+                    "pipeline": latest_assignments_pipeline(student) + [{"$project": DASHBOARD_ASSIGNMENT_FIELDS}],
+                    "as": "rows"
+                }},
+                {"$unwind": "$rows"},
+                {"$replaceRoot": {"newRoot": "$rows"}}
+            ],
+            "current_rank": [
+                {"$limit": 1},
+                {"$lookup": {
+                    "from": "current_rankings",
+                    "pipeline": [{"$match": student}, {"$project": DASHBOARD_RANK_FIELDS}],
+                    "as": "rows"
+                }},
+                {"$unwind": "$rows"},
+                {"$replaceRoot": {"newRoot": "$rows"}}
+            ]
+        }},
+        {"$project": {
+            "history": 1,
+            "daily_changes": 1,
+            "assignments": 1,
+            "current_rank": {"$arrayElemAt": ["$current_rank", 0]}
+        }}
+    ]
+
+async def read_student_dashboard(class_id: str, student_name: str) -> Optional[bytes]:
+    cursor = await get_db().student_daily_stats.aggregate(student_dashboard_pipeline(class_id, student_name))
+    dashboard = (await cursor.to_list(None))[0]
+    if not dashboard["history"]:
+        return None
+    return dumps({"class_id": class_id, "student_name": student_name, **dashboard})
+
+@router.get("/student/{student_name}/dashboard")
+async def get_student_dashboard(student_name: str, class_id: str = Depends(resolve_class_id)):
+    """Everything a student's page shows in one response: points and ranks
+    over time, daily changes, current assignment states and current ranks.
+    """
+    try:
+        dashboard = await response_cache.get_or_load(
+            ("student_dashboard", class_id, student_name),
+            lambda: read_student_dashboard(class_id, student_name)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail=f"No data for student {student_name}")
+    return FastJSONResponse(dashboard)
 
 # 3. Daily Change Endpoints
 @router.get("/student/{student_name}/daily-changes", response_model=List[DailyChangeResponse])
-async def get_student_daily_changes(student_name: str):
+async def get_student_daily_changes(student_name: str, class_id: str = Depends(resolve_class_id)):
     """Get daily changes in mastery points for a student"""
     try:
-        documents = client.Amba.student_daily_stats.find(
-            {"student_name": student_name},
+        documents = get_db().student_daily_stats.find(
+            {"class_id": class_id, "student_name": student_name},
             {
                 "export_date": 1,
                 "daily_mastery_points": 1,
                 "_id": 0
             }
         ).sort("export_date", 1)
-        return list(documents)
+        return FastJSONResponse(await documents.to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 4. Overall Progress Endpoints
 @router.get("/overall/progress", response_model=List[DailyOverallStats])
-async def get_overall_progress():
+async def get_overall_progress(class_id: str = Depends(resolve_class_id)):
     """Get overall progress stats over time"""
     try:
-        cursor = client.Amba.daily_overall_stats.find(
-            {},
-            {'_id': 0}
-        ).sort("export_date", 1)
-        
-        return list(cursor)
+        return FastJSONResponse(await response_cache.get_or_load(
+            ("overall_progress", class_id),
+            lambda: encode_cursor(get_db().daily_overall_stats.find(
+                {"class_id": class_id},
+                STATS_PROJECTION
+            ).sort("export_date", 1))
+        ))
     except Exception as e:
         print(f"Error in get_overall_progress: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Weekly and monthly rollups, maintained by the importer
+RollupPeriod = Literal["week", "month"]
+ROLLUP_PROJECTION = {"_id": 0, "refresh_id": 0}
+
+@router.get("/overall/rollups")
+async def get_overall_rollups(period: RollupPeriod = "week", class_id: str = Depends(resolve_class_id)):
+    """Class-wide progress pre-aggregated per week or month"""
+    try:
+        return FastJSONResponse(await response_cache.get_or_load(
+            ("overall_rollups", class_id, period),
+            lambda: encode_cursor(get_db().class_rollups.find(
+                {"class_id": class_id, "period": period},
+                ROLLUP_PROJECTION
+            ).sort("period_start", 1))
+        ))
+    except Exception as e:
+        print(f"Error in get_overall_rollups: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/student/{student_name}/rollups")
+async def get_student_rollups(
+    student_name: str,
+    period: RollupPeriod = "week",
+    class_id: str = Depends(resolve_class_id)
+):
+    """One student's progress pre-aggregated per week or month"""
+    try:
+        return FastJSONResponse(await get_db().student_rollups.find(
+            {"class_id": class_id, "period": period, "student_name": student_name},
+            ROLLUP_PROJECTION
+        ).sort("period_start", 1).to_list(None))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # 5. Course Challenges Progress
 @router.get("/overall/course-challenges")
-async def get_course_challenges_progress():
+async def get_course_challenges_progress(class_id: str = Depends(resolve_class_id)):
     """Get total course challenges passed over time"""
     try:
-        return list(client.Amba.daily_overall_stats.find(
-            {},
-            {"export_date": 1, "total_course_challenges_passed": 1}
-        ).sort("export_date", 1))
+        return FastJSONResponse(await get_db().daily_overall_stats.find(
+            {"class_id": class_id},
+            {"export_date": 1, "total_course_challenges_passed": 1, "_id": 0}
+        ).sort("export_date", 1).to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # 6. Date Range Analysis
+# The class's total_*_points are what each export added, so they add up over
+# a period; the averages are averaged, like the class rollups
+OVERALL_SERIES_FIELDS = {
+    "total_mastery_points": "$sum",
+    "total_perseverance_points": "$sum",
+    "total_course_challenges_passed": "$last",
+    "average_mastery_points": "$avg",
+    "average_perseverance_points": "$avg"
+}
+
 @router.get("/analysis/date-range")
-async def get_date_range_analysis(start_date: datetime, end_date: datetime):
-    """Get analysis for a specific date range"""
+async def get_date_range_analysis(
+    start_date: datetime,
+    end_date: datetime,
+    bucket: Optional[Bucket] = None,
+    class_id: str = Depends(resolve_class_id)
+):
+    """Get analysis for a specific date range, optionally one point per day, week or month"""
     try:
-        return list(client.Amba.daily_overall_stats.find({
+        query = {
+            "class_id": class_id,
             "export_date": {
                 "$gte": start_date,
                 "$lte": end_date
             }
-        }).sort("export_date", 1))
+        }
+        if bucket:
+            return await read_bucketed_series(get_db().daily_overall_stats, query, bucket, OVERALL_SERIES_FIELDS)
+        return FastJSONResponse(await get_db().daily_overall_stats.find(
+            query,
+            STATS_PROJECTION
+        ).sort("export_date", 1).to_list(None))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the response cache for monitoring"""
+    return response_cache.stats()
 
 @router.get("/test")
 async def test_endpoint():
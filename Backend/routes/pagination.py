@@ -0,0 +1,43 @@
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from routes.fast_json import FastJSONResponse, dumps
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+STREAM_BATCH_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def keyset_filter(query: dict, after: str = None) -> dict:
+    """Extend a query so it only matches documents after the given _id cursor"""
+    if not after:
+        return query
+    if not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {**query, "_id": {"$gt": ObjectId(after)}}
+
+def page_response(documents: list, limit: int):
+    """Send one page, advertising the last _id as the next cursor when more may follow"""
+    response = FastJSONResponse(documents)
+    if len(documents) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(documents[-1]["_id"])
+    return response
+
+async def fetch_page(collection, query: dict, after: str, limit: int, projection: dict = None):
+    """Read one page in _id order and advertise the next cursor when more may follow"""
+    cursor = collection.find(keyset_filter(query, after), projection).sort("_id", 1).limit(limit)
+    return page_response(await cursor.to_list(None), limit)
+
+async def iter_ndjson(cursor):
+    """Yield one JSON line per document as the cursor produces it"""
+    async for document in cursor:
+        yield dumps(document) + b"\n"
+
+def stream_documents(collection, query: dict, after: str = None, projection: dict = None):
+    """Stream every matching document as NDJSON without buffering the result set"""
+    cursor = collection.find(keyset_filter(query, after), projection).sort("_id", 1).batch_size(STREAM_BATCH_SIZE)
+    return stream_cursor(cursor)
+
+def stream_cursor(cursor):
+    """Stream an open cursor, e.g. an aggregation's, as NDJSON"""
+    return StreamingResponse(iter_ndjson(cursor), media_type="application/x-ndjson")
@@ -3,6 +3,6 @@ Scripts for data import and management operations.
 Contains utilities for importing Khan Academy CSV data into MongoDB.
 """
 
-from .import_khan_csv import process_khan_csv, insert_to_mongodb, parse_date_from_filename
+from .import_khan_csv import iter_csv_rows, insert_to_mongodb, parse_date_from_filename, backfill
 
-__all__ = ['process_khan_csv', 'insert_to_mongodb', 'parse_date_from_filename']
+__all__ = ['iter_csv_rows', 'insert_to_mongodb', 'parse_date_from_filename', 'backfill']
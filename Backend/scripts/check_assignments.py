@@ -1,7 +1,7 @@
-from configurations import client
+from configurations import get_client
 
 def check_assignments():
-    db = client["Amba"]
+    db = get_client()["Amba"]
     
     # Check total number of assignments
     total = db.assignment_completions.count_documents({})
@@ -0,0 +1,266 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from os.path import dirname, abspath
+
+# Add the Backend directory to Python path
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+import pymongo
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from database.indexes import ensure_indexes
+from routes.khan_data import (
+    ASSIGNMENT_PROJECTION,
+    OVERALL_SERIES_FIELDS,
+    RANKING_PROJECTION,
+    STATS_PROJECTION,
+    STUDENT_SERIES_FIELDS,
+    assignments_as_of_pipeline,
+    bucketed_series_pipeline,
+    student_dashboard_pipeline
+)
+from scripts.import_khan_csv import latest_totals_pipeline, previous_snapshot_pipeline
+
+def find(collection, filter, sort=None, projection=None, limit=None):
+    command = {"find": collection, "filter": filter}
+    if sort:
+        command["sort"] = sort
+    if projection:
+        command["projection"] = projection
+    if limit:
+        command["limit"] = limit
+    return command
+
+def aggregate(collection, pipeline):
+    return {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+
+def delete(collection, filter):
+    return {"delete": collection, "deletes": [{"q": filter, "limit": 0}]}
+
+def query_shapes(class_id, student_name, assignment_type, export_date):
+    """(label, explain command) for every query the API and the importer send"""
+    start, end = export_date - timedelta(days=30), export_date
+    student = {"class_id": class_id, "student_name": student_name}
+    by_type = {"class_id": class_id, "assignment_type": assignment_type}
+    after = {"_id": {"$gt": ObjectId("000000000000000000000000")}}
+    last_assignment = {"student_name": student_name, "assignment_name": "assignment", "occurrence": 0}
+    student_range = {**student, "export_date": {"$gte": start, "$lte": end}}
+    class_range = {"class_id": class_id, "export_date": {"$gte": start, "$lte": end}}
+    return [
+        # routes/khan_data.py
+        ("students by prefix", find(
+            "students", {"class_id": class_id, "search_name": {"$regex": "^a", "$gt": "a"}},
+            {"search_name": 1}, {"student_name": 1, "search_name": 1, "_id": 0}, 100
+        )),
+        ("student assignment page", find(
+            "assignment_completions", {**student, **after}, {"_id": 1}, ASSIGNMENT_PROJECTION, 500
+        )),
+        ("assignment type page", find(
+            "assignment_completions", {**by_type, **after}, {"_id": 1}, ASSIGNMENT_PROJECTION, 500
+        )),
+        ("student assignments as_of", aggregate(
+            "assignment_completions", assignments_as_of_pipeline(student, export_date, limit=500)
+        )),
+        ("assignment type as_of", aggregate(
+            "assignment_completions", assignments_as_of_pipeline(by_type, export_date, limit=500)
+        )),
+        ("assignment type as_of next page", aggregate(
+            "assignment_completions", assignments_as_of_pipeline(by_type, export_date, last_assignment, 500)
+        )),
+        ("as_of cursor", find("assignment_completions", after, limit=1)),
+        ("student date range", find(
+            "assignment_completions", student_range, {"export_date": 1}, {"_id": 0, "import_id": 0}
+        )),
+        ("student date range by week", aggregate(
+            "student_daily_stats", bucketed_series_pipeline(student_range, "week", STUDENT_SERIES_FIELDS)
+        )),
+        ("mastery rankings", find(
+            "current_rankings", {"class_id": class_id, "rank_by_mastery": {"$gt": 0}},
+            {"rank_by_mastery": 1}, RANKING_PROJECTION, 50
+        )),
+        ("perseverance rankings", find(
+            "current_rankings", {"class_id": class_id, "rank_by_perseverance": {"$gt": 0}},
+            {"rank_by_perseverance": 1}, RANKING_PROJECTION, 50
+        )),
+        ("student dashboard", aggregate(
+            "student_daily_stats", student_dashboard_pipeline(class_id, student_name)
+        )),
+        ("student progress and daily changes", find(
+            "student_daily_stats", student, {"export_date": 1}, STATS_PROJECTION
+        )),
+        ("overall progress and course challenges", find(
+            "daily_overall_stats", {"class_id": class_id}, {"export_date": 1}, STATS_PROJECTION
+        )),
+        ("overall rollups", find(
+            "class_rollups", {"class_id": class_id, "period": "week"}, {"period_start": 1}
+        )),
+        ("student rollups", find(
+            "student_rollups", {"class_id": class_id, "period": "week", "student_name": student_name},
+            {"period_start": 1}
+        )),
+        ("date range analysis", find(
+            "daily_overall_stats", class_range, {"export_date": 1}, STATS_PROJECTION
+        )),
+        ("date range analysis by month", aggregate(
+            "daily_overall_stats", bucketed_series_pipeline(class_range, "month", OVERALL_SERIES_FIELDS)
+        )),
+        # scripts/import_khan_csv.py
+        ("import manifest entry", find("import_manifest", {"_id": "Downloaded export.csv"}, limit=1)),
+        ("previous snapshot", aggregate(
+            "assignment_completions", previous_snapshot_pipeline(class_id, export_date)
+        )),
+        ("previous totals", aggregate("student_daily_stats", latest_totals_pipeline(
+            {"class_id": class_id, "student_name": {"$in": [student_name]}, "export_date": {"$lt": export_date}}
+        ))),
+        ("next export", find(
+            "daily_overall_stats", {"class_id": class_id, "export_date": {"$gt": export_date}},
+            {"export_date": 1}, {"export_date": 1}, 1
+        )),
+        ("next export's stored rows", find(
+            "assignment_completions", {"class_id": class_id, "export_date": export_date},
+            projection={"student_name": 1, "assignment_name": 1, "occurrence": 1, "_id": 0}
+        )),
+        ("assignment upsert", find("assignment_completions", {
+            "class_id": class_id, "export_date": export_date, "student_name": student_name,
+            "assignment_name": "assignment", "occurrence": 0
+        }, limit=1)),
+        ("stale assignments", delete(
+            "assignment_completions",
+            {"class_id": class_id, "export_date": export_date, "import_id": {"$ne": ObjectId()}}
+        )),
+        ("student daily stats upsert", find(
+            "student_daily_stats", {"class_id": class_id, "export_date": export_date, "student_name": student_name},
+            limit=1
+        )),
+        ("stale student daily stats", delete(
+            "student_daily_stats", {"class_id": class_id, "export_date": export_date, "import_id": {"$ne": ObjectId()}}
+        )),
+        ("leaderboard export date", find(
+            "current_rankings", {"class_id": class_id}, {"export_date": -1}, {"export_date": 1}, 1
+        )),
+        ("leaderboard upsert", find("current_rankings", student, limit=1)),
+        ("leaderboard leavers", delete("current_rankings", {"class_id": class_id, "export_date": {"$ne": export_date}})),
+        ("roster upsert", find("students", student, limit=1)),
+        ("overall stats upsert", find("daily_overall_stats", {"class_id": class_id, "export_date": export_date}, limit=1)),
+        ("totals before a recompute", aggregate(
+            "student_daily_stats", latest_totals_pipeline({"class_id": class_id, "export_date": {"$lte": export_date}})
+        )),
+        ("rows after a recompute", find(
+            "student_daily_stats", {"class_id": class_id, "export_date": {"$gt": start}}, {"export_date": 1}
+        )),
+        ("student rows for rollups", find(
+            "student_daily_stats", {"class_id": class_id, "export_date": {"$gte": start}}, {"export_date": 1}
+        )),
+        ("overall rows for rollups", find(
+            "daily_overall_stats", {"class_id": class_id, "export_date": {"$gte": start}}, {"export_date": 1}
+        )),
+        ("student rollup upsert", find("student_rollups", {
+            "class_id": class_id, "period": "week", "period_start": start, "student_name": student_name
+        }, limit=1)),
+        ("stale student rollups", delete("student_rollups", {
+            "class_id": class_id, "period": "week", "period_start": {"$gte": start}, "refresh_id": {"$ne": ObjectId()}
+        })),
+        ("class rollup upsert", find(
+            "class_rollups", {"class_id": class_id, "period": "week", "period_start": start}, limit=1
+        )),
+        ("stale class rollups", delete("class_rollups", {
+            "class_id": class_id, "period": "week", "period_start": {"$gte": start}, "refresh_id": {"$ne": ObjectId()}
+        }))
+    ]
+
+def iter_plan_stages(node):
+    """Yield (stage name, whether a GROUP feeds it) for every stage of a plan tree"""
+    if isinstance(node, list):
+        for child in node:
+            yield from iter_plan_stages(child)
+        return
+    if not isinstance(node, dict):
+        return
+    children = [node[key] for key in ("queryPlan", "inputStage", "inputStages", "outerStage", "innerStage") if key in node]
+    groups_below = any(stage == "GROUP" for child in children for stage, _ in iter_plan_stages(child))
+    if "stage" in node:
+        yield node["stage"], groups_below
+    for child in children:
+        yield from iter_plan_stages(child)
+
+def iter_winning_plans(explain):
+    """Every winning plan in an explain result, whatever the pipeline or sharding layout"""
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            yield explain["winningPlan"]
+        for value in explain.values():
+            yield from iter_winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from iter_winning_plans(value)
+
+def plan_problems(explain):
+    """Collection scans, and sorts that are not served by an index"""
+    problems = []
+    for plan in iter_winning_plans(explain):
+        for stage, after_group in iter_plan_stages(plan):
+            if stage == "COLLSCAN":
+                problems.append("COLLSCAN")
+            # Sorting grouped results is expected; sorting the documents themselves is not
+            elif stage == "SORT" and not after_group:
+                problems.append("in-memory SORT")
+    # A $sort the planner could not absorb stays a pipeline stage ahead of $group
+    names = [next(iter(stage)) for stage in explain.get("stages", []) if isinstance(stage, dict)]
+    if "$sort" in names and "$group" in names and names.index("$sort") < names.index("$group"):
+        problems.append("in-memory $sort before $group")
+    return problems
+
+def sample_values(db, class_id):
+    """A class, student, assignment type and export date to fill the query shapes with"""
+    if class_id is None:
+        state = db.import_metadata.find_one({"_id": "import_state"}) or {}
+        class_id = state.get("latest_class_id") or "default"
+    student = db.students.find_one({"class_id": class_id}) or {}
+    assignment = db.assignment_completions.find_one({"class_id": class_id}) or {}
+    overall = db.daily_overall_stats.find_one({"class_id": class_id}, sort=[("export_date", -1)]) or {}
+    return (
+        class_id,
+        student.get("student_name", "student"),
+        assignment.get("assignment_type", "Exercise"),
+        overall.get("export_date", datetime(2025, 1, 1))
+    )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Explain every API and importer query and fail on collection scans or in-memory sorts"
+    )
+    parser.add_argument("--database", default=os.getenv("MONGODB_DATABASE", "Amba"))
+    parser.add_argument("--class-id", default=None, help="class to fill the queries with; defaults to the latest import's")
+    parser.add_argument("--create-indexes", action="store_true", help="apply database/indexes.py first")
+    args = parser.parse_args()
+
+    load_dotenv()
+    uri = os.getenv("MONGODB_URI")
+    if not uri:
+        print("Error: MONGODB_URI environment variable not set")
+        sys.exit(1)
+    db = pymongo.MongoClient(uri)[args.database]
+    if args.create_indexes:
+        ensure_indexes(db)
+
+    failures = 0
+    for label, command in query_shapes(*sample_values(db, args.class_id)):
+        explain = db.command("explain", command, verbosity="queryPlanner")
+        problems = plan_problems(explain)
+        collection = command.get("find") or command.get("aggregate") or command.get("delete")
+        if problems:
+            failures += 1
+            print(f"FAIL  {collection}: {label} ({', '.join(problems)})")
+        else:
+            print(f"ok    {collection}: {label}")
+
+    if failures:
+        print(f"\n{failures} queries are not fully served by an index; add one to database/indexes.py")
+        sys.exit(1)
+    print("\nEvery query is served by an index")
+
+if __name__ == "__main__":
+    main()
@@ -5,25 +5,31 @@ from pathlib import Path
 backend_dir = Path(__file__).resolve().parent.parent
 sys.path.append(str(backend_dir))
 
-from configurations import client
+from configurations import get_client
+from database.import_state import IMPORT_STATE_ID
+from database.indexes import INDEXES
 
-def clear_database():
-    db = client["Amba"]
+def clear_database(db=None):
+    db = get_client()["Amba"] if db is None else db
     
-    # Clear all collections
-    db.assignment_completions.delete_many({})
-    db.student_daily_stats.delete_many({})
-    db.daily_overall_stats.delete_many({})
+    # Clear every collection the importer writes, the manifest included,
+    # so the same exports can be imported again
+    for name in INDEXES:
+        db[name].delete_many({})
     
-    # Verify collections are empty
-    assignments = db.assignment_completions.count_documents({})
-    student_stats = db.student_daily_stats.count_documents({})
-    overall_stats = db.daily_overall_stats.count_documents({})
+    # Forget the imported classes and dates but keep counting generations,
+    # so the API's cache and ETags never reuse one from before the clear
+    db.import_metadata.delete_many({"_id": {"$ne": IMPORT_STATE_ID}})
+    db.import_metadata.update_one(
+        {"_id": IMPORT_STATE_ID},
+        {"$inc": {"generation": 1}, "$unset": {"latest_export_date": "", "latest_class_id": "", "class_ids": ""}},
+        upsert=True
+    )
     
+    # Verify collections are empty
     print(f"Cleared database:")
-    print(f"- Assignments: {assignments} documents")
-    print(f"- Student Stats: {student_stats} documents")
-    print(f"- Overall Stats: {overall_stats} documents")
+    for name in INDEXES:
+        print(f"- {name}: {db[name].count_documents({})} documents")
 
 if __name__ == "__main__":
-    clear_database() 
\ No newline at end of file
+    clear_database() 
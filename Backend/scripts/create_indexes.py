@@ -1,5 +1,12 @@
 import pymongo
 import os
+import sys
+from os.path import dirname, abspath
+
+# Add the Backend directory to Python path
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from database.indexes import ensure_indexes
 
 # Try to import dotenv, but handle the case where it's not installed
 try:
@@ -19,17 +26,7 @@ def create_indexes():
         return
         
     client = pymongo.MongoClient(uri)
-    db = client["Amba"]
-    
-    # Create indexes for assignment_completions
-    db.assignment_completions.create_index([("student_name", 1), ("export_date", -1)])
-    
-    # Create indexes for student_daily_stats
-    db.student_daily_stats.create_index([("student_name", 1), ("export_date", -1)])
-    
-    # Create index for daily_overall_stats
-    db.daily_overall_stats.create_index([("export_date", -1)])
-    
+    ensure_indexes(client["Amba"])
     print("Indexes created successfully")
 
 if __name__ == "__main__":
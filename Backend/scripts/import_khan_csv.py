@@ -1,83 +1,617 @@
+import argparse
 import csv
-from datetime import datetime
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import hashlib
+from itertools import islice
+from bson import ObjectId
 import pymongo
 from pathlib import Path
+import queue
+import re
 import sys
 import os
+import threading
+import time
 from os.path import dirname, abspath
 from dotenv import load_dotenv
 
 # Add the Backend directory to Python path
 sys.path.append(dirname(dirname(abspath(__file__))))
 
-from database.models import AssignmentCompletion, StudentDailyStats, DailyOverallStats
-from database.schemas import compute_points, process_daily_data
+from database.models import StudentDailyStats, DailyOverallStats
+from database.schemas import iter_assignment_records
+from database.import_state import bump_import_generation
+from database.rollups import refresh_rollups
+from database.snapshots import latest_rows_pipeline
+
+# Rows scored and written per bulk_write round trip
+BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+
+# "auto" uses a transaction per date whenever the deployment supports them
+IMPORT_TRANSACTIONS = os.getenv("IMPORT_TRANSACTIONS", "auto")
+
+# An in-progress manifest entry older than this is taken to be from a crashed
+# run and may be claimed again
+IMPORT_CLAIM_TIMEOUT = float(os.getenv("IMPORT_CLAIM_TIMEOUT", "3600"))
+
+# Seconds between attempts to take a class's import lock held by another run
+CLASS_LOCK_POLL = float(os.getenv("IMPORT_CLASS_LOCK_POLL", "1"))
+
+# Seconds between directory polls in --watch mode, and how long a file's
+# size and mtime must hold still before it is considered fully written
+WATCH_INTERVAL = float(os.getenv("IMPORT_WATCH_INTERVAL", "2"))
+WATCH_DEBOUNCE = float(os.getenv("IMPORT_WATCH_DEBOUNCE", "3"))
+# Longest wait before retrying a file whose import failed or was held by another run
+WATCH_MAX_BACKOFF = float(os.getenv("IMPORT_WATCH_MAX_BACKOFF", "300"))
+
+# Class of exports whose file name does not carry one; the API's default
+# class is API_DEFAULT_CLASS_ID
+DEFAULT_CLASS_ID = os.getenv("DEFAULT_CLASS_ID", "default")
+
+CSV_DIR = Path(dirname(dirname(abspath(__file__)))) / "documents" / "khan_csv_files"
+
+_client = None
+
+def get_database():
+    """Return the Amba database through one client shared by the whole run"""
+    global _client
+    if _client is None:
+        # Load environment variables
+        load_dotenv()
+        
+        # Get MongoDB URI from environment variable
+        uri = os.getenv("MONGODB_URI")
+        if not uri:
+            print("Error: MONGODB_URI environment variable not set")
+            return None
+        _client = pymongo.MongoClient(uri)
+    return _client["Amba"]
 
 def parse_date_from_filename(filename):
     filename_str = filename.name
     date_str = filename_str.split("Downloaded ")[1].split(" -")[0]
     return datetime.strptime(date_str, "%Y.%m.%d")
 
-def insert_to_mongodb(csv_data, export_date):
-    # Load environment variables
-    load_dotenv()
+def parse_class_from_filename(filename):
+    """Slug of the class name that ends an export's file name.
+
+    "Downloaded 2025.02.05 - All assignments - Middle School Physics Kakolo.csv"
+    belongs to class "middle-school-physics-kakolo".
+    """
+    parts = filename.stem.split(" - ")
+    name = parts[-1] if len(parts) >= 3 else ""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or DEFAULT_CLASS_ID
+
+# The only columns scoring reads
+SCORED_COLUMNS = (
+    "Assignment Name", "Student Name", "Score Best Ever", "Points Possible", "Number Of Attempts", "Assignment Type"
+)
+
+def iter_csv_rows(path):
+    """Yield CSV rows one at a time, handling any BOM.
+
+    Rows hold just the scored columns. csv.reader plus one small dict per
+    row is cheaper than csv.DictReader's dict of every column, and rows
+    come out the same: blank lines are skipped and cells missing from a
+    short line are None.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [(name, header.index(name)) for name in SCORED_COLUMNS if name in header]
+        for line in reader:
+            if not line:
+                continue
+            width = len(line)
+            yield {name: line[index] if index < width else None for name, index in columns}
+
+def iter_file_records(path, export_date, student_stats):
+    """Score an export file"""
+    return iter_assignment_records(iter_csv_rows(path), export_date, student_stats)
+
+def chunked(iterable, size):
+    """Group an iterable into lists of at most `size` items"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+class BulkWriter:
+    """Writes chunks with unordered bulk_write on a background thread.
+
+    The bounded queue lets the next chunk be parsed and scored while the
+    previous one is in flight, without ever holding more than a few chunks.
+    """
+
+    def __init__(self, collection, make_request=pymongo.InsertOne, session=None, max_pending=2):
+        self.collection = collection
+        self.make_request = make_request
+        self.session = session
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._queue.put(None)
+        self._thread.join()
+        if self.error and exc_type is None:
+            raise self.error
+
+    def _run(self):
+        while (chunk := self._queue.get()) is not None:
+            if self.error:
+                continue
+            try:
+                self.collection.bulk_write(
+                    [self.make_request(doc) for doc in chunk], ordered=False, session=self.session
+                )
+                self.written += len(chunk)
+            except Exception as e:
+                self.error = e
+
+    def write(self, chunk):
+        if self.error:
+            raise self.error
+        self._queue.put(chunk)
+
+def refresh_current_rankings(db, class_id, export_date, daily_stats, session=None):
+    """Materialize the class leaderboard when this export is its newest one.
+
+    `daily_stats` holds the date's student_daily_stats documents as dicts.
+    """
+    latest = db.current_rankings.find_one(
+        {"class_id": class_id}, {"export_date": 1}, sort=[("export_date", -1)], session=session
+    )
+    if latest and latest["export_date"] > export_date:
+        return
+    
+    requests = [
+        pymongo.ReplaceOne(
+            {"class_id": class_id, "student_name": s["student_name"]},
+            {
+                "class_id": class_id,
+                "student_name": s["student_name"],
+                "export_date": export_date,
+                "total_mastery_points": s["total_mastery_points"],
+                "total_perseverance_points": s["total_perseverance_points"],
+                "rank_by_mastery": s["rank_by_mastery"],
+                "rank_by_perseverance": s["rank_by_perseverance"]
+            },
+            upsert=True
+        )
+        for s in daily_stats
+    ]
+    if requests:
+        db.current_rankings.bulk_write(requests, ordered=False, session=session)
+    # Drop students that are no longer part of the latest export
+    db.current_rankings.delete_many({"class_id": class_id, "export_date": {"$ne": export_date}}, session=session)
+    print(f"Refreshed current rankings for {len(requests)} students")
+
+def sync_student_roster(db, class_id, export_date, student_names, session=None):
+    """Upsert every student of this export into the class roster"""
+    requests = [
+        pymongo.UpdateOne(
+            {"class_id": class_id, "student_name": name},
+            {
+                "$set": {"search_name": name.lower()},
+                "$min": {"first_seen": export_date},
+                "$max": {"last_seen": export_date}
+            },
+            upsert=True
+        )
+        for name in student_names
+    ]
+    if requests:
+        db.students.bulk_write(requests, ordered=False, session=session)
+
+class CarriedState:
+    """What one date hands to the next during an in-order multi-file import"""
+
+    def __init__(self):
+        self.export_date = None
+        self.totals = {}
+        self.snapshot = None
+
+    def clear(self):
+        self.export_date = None
+        self.totals = {}
+        self.snapshot = None
+
+def previous_export_date(db, class_id, export_date, session=None):
+    """Date of the class's latest stored export before export_date, or None"""
+    previous = db.daily_overall_stats.find_one(
+        {"class_id": class_id, "export_date": {"$lt": export_date}},
+        {"export_date": 1},
+        sort=[("export_date", -1)],
+        session=session
+    )
+    return previous["export_date"] if previous else None
+
+# Fields compared between exports to decide whether a row changed
+SNAPSHOT_FIELDS = (
+    "assignment_type",
+    "points_possible",
+    "score_best",
+    "number_of_attempts",
+    "mastery_achieved",
+    "perseverance_points"
+)
+
+def snapshot_key(record):
+    return (record["student_name"], record["assignment_name"], record.get("occurrence", 0))
+
+def snapshot_signature(record):
+    return tuple(record[field] for field in SNAPSHOT_FIELDS)
+
+def previous_snapshot_pipeline(class_id, export_date):
+    """Latest stored row per assignment before export_date, tombstones dropped"""
+    return latest_rows_pipeline({"class_id": class_id, "export_date": {"$lt": export_date}})
+
+def load_previous_snapshot(db, class_id, export_date, session=None):
+    """Rebuild the class's assignment state as of the last export before export_date"""
+    pipeline = previous_snapshot_pipeline(class_id, export_date)
+    return {
+        snapshot_key(doc): snapshot_signature(doc)
+        for doc in db.assignment_completions.aggregate(pipeline, allowDiskUse=True, session=session)
+    }
+
+def iter_changed_records(records, previous, current):
+    """Yield only records that are new or differ from the previous snapshot.
+
+    Every record's signature is collected into `current`, which becomes the
+    previous snapshot of the next export.
+    """
+    for record in records:
+        key = snapshot_key(record)
+        signature = snapshot_signature(record)
+        current[key] = signature
+        if previous.get(key) != signature:
+            yield record
+
+def iter_removed_records(previous, current, export_date):
+    """Yield tombstones for rows that were in the previous export but not this one"""
+    for key in previous.keys() - current.keys():
+        student_name, assignment_name, occurrence = key
+        yield {
+            "export_date": export_date,
+            "student_name": student_name,
+            "assignment_name": assignment_name,
+            **dict(zip(SNAPSHOT_FIELDS, previous[key])),
+            "occurrence": occurrence,
+            "removed": True
+        }
+
+def latest_totals_pipeline(match):
+    """Each matched student's most recent cumulative totals"""
+    return [
+        {"$match": match},
+        {"$sort": {"student_name": 1, "export_date": -1}},
+        {"$group": {
+            "_id": "$student_name",
+            "total_mastery_points": {"$first": "$total_mastery_points"},
+            "total_perseverance_points": {"$first": "$total_perseverance_points"}
+        }}
+    ]
+
+def load_previous_totals(db, class_id, export_date, student_names, carried=None, session=None):
+    """Fetch each student's latest cumulative totals before export_date.
+
+    Students found in `carried` (totals kept in memory from the previous file
+    of a batch) are taken from there; the rest come from one aggregation.
+    """
+    carried = carried or {}
+    totals = {name: carried[name] for name in student_names if name in carried}
+    missing = [name for name in student_names if name not in carried]
+    if missing:
+        pipeline = latest_totals_pipeline(
+            {"class_id": class_id, "student_name": {"$in": missing}, "export_date": {"$lt": export_date}}
+        )
+        for doc in db.student_daily_stats.aggregate(pipeline, session=session):
+            totals[doc["_id"]] = doc
+    return totals
+
+def assignment_key(doc):
+    """Natural key of an assignment row within one export"""
+    return {
+        "class_id": doc["class_id"],
+        "export_date": doc["export_date"],
+        "student_name": doc["student_name"],
+        "assignment_name": doc["assignment_name"],
+        "occurrence": doc["occurrence"]
+    }
+
+def supports_transactions(db):
+    """Multi-document transactions need a replica set or a sharded cluster"""
+    if IMPORT_TRANSACTIONS in ("on", "off"):
+        return IMPORT_TRANSACTIONS == "on"
+    hello = db.client.admin.command("hello")
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+def run_in_transaction(db, write):
+    """Call write(session) inside one transaction, or write(None) where unsupported"""
+    if not supports_transactions(db):
+        return write(None)
+    with db.client.start_session() as session:
+        with session.start_transaction():
+            return write(session)
+
+def load_next_baseline(db, class_id, export_date, session=None):
+    """Find the next stored export and the state its changes were stored against.
+
+    Returns (next_date, snapshot), or (None, None) when export_date is the
+    newest export. Must be called before export_date's rows are written.
+    """
+    following = db.daily_overall_stats.find_one(
+        {"class_id": class_id, "export_date": {"$gt": export_date}},
+        {"export_date": 1},
+        sort=[("export_date", 1)],
+        session=session
+    )
+    if following is None:
+        return None, None
+    return following["export_date"], load_previous_snapshot(db, class_id, following["export_date"], session)
+
+def reconcile_next_snapshot(db, class_id, next_date, baseline, current, session=None):
+    """Keep the next export's stored changes valid after writing an earlier date.
+
+    The next export only stored rows that differed from `baseline`. For every
+    row where this export now differs from it and the next export stored
+    nothing, write the baseline state back at the next export, so that
+    rebuilding the state as of that date is unaffected.
+    """
+    changed = {key for key in baseline.keys() | current.keys() if baseline.get(key) != current.get(key)}
+    if not changed:
+        return 0
+    stored = {
+        snapshot_key(doc)
+        for doc in db.assignment_completions.find(
+            {"class_id": class_id, "export_date": next_date},
+            {"student_name": 1, "assignment_name": 1, "occurrence": 1, "_id": 0},
+            session=session
+        )
+    }
     
-    # Get MongoDB URI from environment variable
-    uri = os.getenv("MONGODB_URI")
+    restored = []
+    for key in changed - stored:
+        student_name, assignment_name, occurrence = key
+        restored.append({
+            "class_id": class_id,
+            "export_date": next_date,
+            "student_name": student_name,
+            "assignment_name": assignment_name,
+            **dict(zip(SNAPSHOT_FIELDS, baseline.get(key) or current[key])),
+            "occurrence": occurrence,
+            # A row the next export never had must stay absent there
+            **({} if key in baseline else {"removed": True})
+        })
+    for chunk in chunked(restored, BATCH_SIZE):
+        db.assignment_completions.bulk_write(
+            [pymongo.ReplaceOne(assignment_key(doc), doc, upsert=True) for doc in chunk],
+            ordered=False,
+            session=session
+        )
+    if restored:
+        print(f"Restored {len(restored)} rows at {next_date.date()} after importing an earlier date")
+    return len(restored)
+
+def recompute_following_totals(db, class_id, export_date, session=None):
+    """Rebuild cumulative totals and ranks for every date after export_date.
+
+    Later rows were built on the totals that existed when they were
+    imported, so a date that arrives late or is replaced makes them wrong.
+    Only dates after export_date are read, one pass in date order, and only
+    rows whose values change are written back, BATCH_SIZE at a time.
+    Everything is derived from stored daily points, so an interrupted run
+    is repaired by running it again. Returns the number of rows changed.
+    """
+    later = {"class_id": class_id, "export_date": {"$gt": export_date}}
+    if db.daily_overall_stats.find_one(later, {"_id": 1}, session=session) is None:
+        return 0
     
-    if not uri:
-        print("Error: MONGODB_URI environment variable not set")
-        return
+    # Running totals as of export_date, for every student
+    pipeline = latest_totals_pipeline({"class_id": class_id, "export_date": {"$lte": export_date}})
+    totals = {
+        doc["_id"]: (doc["total_mastery_points"], doc["total_perseverance_points"])
+        for doc in db.student_daily_stats.aggregate(pipeline, allowDiskUse=True, session=session)
+    }
+    
+    requests = []
+    changed = 0
+    last_day = []
+    
+    def rebuild_day(day):
+        for doc in day:
+            mastery, perseverance = totals.get(doc["student_name"], (0, 0))
+            doc["new"] = {
+                "total_mastery_points": mastery + doc["daily_mastery_points"],
+                "total_perseverance_points": perseverance + doc["daily_perseverance_points"]
+            }
+            totals[doc["student_name"]] = (doc["new"]["total_mastery_points"], doc["new"]["total_perseverance_points"])
         
-    client = pymongo.MongoClient(uri)
-    db = client["Amba"]
+        # Same stable ordering as the importer, which ranked in insertion (_id) order.
+        # Sorting the day here lets the query use the (class_id, export_date) index.
+        day.sort(key=lambda d: d["_id"])
+        for field, rank_field in (("total_mastery_points", "rank_by_mastery"),
+                                  ("total_perseverance_points", "rank_by_perseverance")):
+            for rank, doc in enumerate(sorted(day, key=lambda d: d["new"][field], reverse=True), 1):
+                doc["new"][rank_field] = rank
+        
+        for doc in day:
+            if any(doc.get(field) != value for field, value in doc["new"].items()):
+                requests.append(pymongo.UpdateOne({"_id": doc["_id"]}, {"$set": doc["new"]}))
+    
+    cursor = db.student_daily_stats.find(
+        later,
+        {
+            "export_date": 1,
+            "student_name": 1,
+            "daily_mastery_points": 1,
+            "daily_perseverance_points": 1,
+            "total_mastery_points": 1,
+            "total_perseverance_points": 1,
+            "rank_by_mastery": 1,
+            "rank_by_perseverance": 1
+        },
+        session=session
+    ).sort("export_date", 1)
+    for doc in cursor:
+        if last_day and doc["export_date"] != last_day[0]["export_date"]:
+            rebuild_day(last_day)
+            last_day = []
+            if len(requests) >= BATCH_SIZE:
+                db.student_daily_stats.bulk_write(requests, ordered=False, session=session)
+                changed += len(requests)
+                requests = []
+        last_day.append(doc)
+    rebuild_day(last_day)
+    if requests:
+        db.student_daily_stats.bulk_write(requests, ordered=False, session=session)
+        changed += len(requests)
     
+    refresh_current_rankings(
+        db,
+        class_id,
+        last_day[0]["export_date"],
+        [{"student_name": doc["student_name"], **doc["new"]} for doc in last_day],
+        session
+    )
+    print(f"Recomputed totals after {export_date.date()}: {changed} rows changed")
+    return changed
+
+def acquire_class_lock(db, class_id, owner):
+    """Atomically take a class's import lock; False while another run holds a fresh one"""
+    cutoff = datetime.utcnow() - timedelta(seconds=IMPORT_CLAIM_TIMEOUT)
     try:
-        # Check if data for this date already exists
-        existing_data = db.daily_overall_stats.find_one({"export_date": export_date})
-        if existing_data:
-            print(f"Data for {export_date.date()} already exists. Skipping...")
-            return
-            
-        # Process the CSV data using the schema functions
-        assignments, student_stats = process_daily_data(csv_data, export_date)
-        
-        # Debug: Print sample of assignments to be inserted
-        if assignments:
-            print("\nSample assignments to be inserted:")
-            for a in assignments[:3]:  # Show first 3 assignments
-                print(f"- {a.assignment_name} ({a.assignment_type}) for {a.student_name}")
-        
-        # Clear any existing data for this date
-        db.assignment_completions.delete_many({"export_date": export_date})
-        db.student_daily_stats.delete_many({"export_date": export_date})
-        db.daily_overall_stats.delete_many({"export_date": export_date})
-        
-        # Insert new data and verify
-        if assignments:
-            result = db.assignment_completions.insert_many([a.model_dump() for a in assignments])
-            print(f"\nInserted {len(assignments)} assignment records")
-            
-            # Verify insertion
-            sample = db.assignment_completions.find_one({"_id": result.inserted_ids[0]})
-            print(f"\nVerification - First inserted record:")
-            print(f"- Assignment: {sample.get('assignment_name')}")
-            print(f"- Type: {sample.get('assignment_type')}")
-            print(f"- Student: {sample.get('student_name')}")
+        db.import_locks.find_one_and_update(
+            {"_id": class_id, "locked_at": {"$not": {"$gte": cutoff}}},
+            {"$set": {"owner": owner, "locked_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
+        return False
+    return True
+
+@contextmanager
+def class_lock(db, class_id):
+    """Hold a class's import lock, waiting for any other run that has it.
+
+    Every write reads or rewrites the class's neighbouring dates (the
+    previous snapshot, the next date's baseline, later totals), so two
+    dates of one class must never be written at once. A lock older than
+    IMPORT_CLAIM_TIMEOUT is taken to be from a crashed run.
+    """
+    owner = ObjectId()
+    while not acquire_class_lock(db, class_id, owner):
+        time.sleep(CLASS_LOCK_POLL)
+    try:
+        yield
+    finally:
+        db.import_locks.update_one({"_id": class_id, "owner": owner}, {"$unset": {"owner": "", "locked_at": ""}})
+
+def import_daily_data(records, student_stats, class_id, export_date, db, carried=None):
+    """Write one date for a class, then bring the dates after it and the rollups up to date.
+
+    Only the date's own writes share a transaction, which keeps it well
+    inside the server's transaction lifetime however long the history is.
+    Recomputing later totals and rebuilding rollups touch many dates, so
+    they run afterwards in bounded batches; both are rebuilt from stored
+    data, and a failure there fails the import so a re-run repairs them.
+    Imports of the same class are serialized with class_lock.
+    Returns the number of assignment records written; errors propagate.
+    """
+    with class_lock(db, class_id):
+        written = run_in_transaction(
+            db, lambda session: write_daily_data(records, student_stats, class_id, export_date, db, carried, session)
+        )
+        # A date imported late or replaced invalidates everything after it
+        recompute_following_totals(db, class_id, export_date)
+        # Weekly and monthly rollups for the periods this date touches
+        refresh_rollups(db, class_id, export_date)
+    # Invalidate API caches now that new data has landed
+    bump_import_generation(db, export_date, class_id=class_id)
+    return written
+
+def insert_to_mongodb(csv_data, export_date, db=None, class_id=DEFAULT_CLASS_ID):
+    """Score raw CSV rows and write them as the class's data for export_date"""
+    db = db if db is not None else get_database()
+    if db is None:
+        return 0
+    
+    student_stats = {}
+    records = iter_assignment_records(csv_data, export_date, student_stats)
+    try:
+        return import_daily_data(records, student_stats, class_id, export_date, db)
+    except Exception as e:
+        print(f"Error processing CSV: {str(e)}")
+        return 0
+
+def write_daily_data(records, student_stats, class_id, export_date, db, carried=None, session=None):
+    """Write scored assignment records and the derived daily stats for one class.
+
+    `student_stats` only needs to be complete once `records` is exhausted, so
+    a lazy generator from iter_assignment_records can be passed straight in.
+    Only records that changed since the previous export are stored.
+    Every write is an upsert on the row's natural key, tagged with a fresh
+    import id; rows of this date left over from an earlier attempt are then
+    deleted, so re-running a date converges instead of duplicating.
+    When importing several dates in order, pass the same CarriedState to
+    every call: it is refreshed with each day's totals and snapshot, and
+    only used when its date is the latest stored before export_date.
+    Returns the number of assignment records written; errors propagate.
+    """
+    import_id = ObjectId()
+    try:
+        # Carried state only stands in for the database when it describes the
+        # export right before this one; a stored date in between makes it stale
+        if carried is not None and carried.export_date != previous_export_date(db, class_id, export_date, session):
+            carried.clear()
+        
+        # Compare against the previous export and write only the changes
+        if carried is not None and carried.snapshot is not None:
+            previous = carried.snapshot
+        else:
+            previous = load_previous_snapshot(db, class_id, export_date, session)
+        current = {}
+        next_date, baseline = load_next_baseline(db, class_id, export_date, session)
+        
+        def upsert_assignment(doc):
+            doc["class_id"] = class_id
+            doc["import_id"] = import_id
+            return pymongo.ReplaceOne(assignment_key(doc), doc, upsert=True)
+        
+        with BulkWriter(db.assignment_completions, upsert_assignment, session) as writer:
+            for chunk in chunked(iter_changed_records(records, previous, current), BATCH_SIZE):
+                writer.write(chunk)
+            for chunk in chunked(iter_removed_records(previous, current, export_date), BATCH_SIZE):
+                writer.write(chunk)
+        stale = {"class_id": class_id, "export_date": export_date, "import_id": {"$ne": import_id}}
+        db.assignment_completions.delete_many(stale, session=session)
+        print(f"\nStored {writer.written} new or changed assignment records out of {len(current)}")
+        written = writer.written
         
         # Calculate and insert daily stats
         daily_stats = []
         total_mastery = 0
         total_perseverance = 0
         
+        # Get previous totals for every student in one round trip
+        previous_totals = load_previous_totals(
+            db, class_id, export_date, list(student_stats), carried.totals if carried is not None else None, session
+        )
+        
         for student, stats in student_stats.items():
-            # Get previous totals for student
-            prev_stats = db.student_daily_stats.find_one(
-                {"student_name": student},
-                sort=[("export_date", -1)]
-            )
-            
+            prev_stats = previous_totals.get(student)
             new_stats = StudentDailyStats(
+                class_id=class_id,
                 export_date=export_date,
                 student_name=student,
                 daily_mastery_points=stats["mastery_points"],
@@ -101,13 +635,28 @@ def insert_to_mongodb(csv_data, export_date):
         for i, stats in enumerate(sorted_by_perseverance, 1):
             stats.rank_by_perseverance = i
         
-        # Insert daily student stats
+        # Upsert daily student stats
         if daily_stats:
-            db.student_daily_stats.insert_many([s.model_dump() for s in daily_stats])
-            print(f"Inserted {len(daily_stats)} student daily stats")
+            db.student_daily_stats.bulk_write(
+                [
+                    pymongo.ReplaceOne(
+                        {"class_id": class_id, "export_date": export_date, "student_name": s.student_name},
+                        {**s.model_dump(), "import_id": import_id},
+                        upsert=True
+                    )
+                    for s in daily_stats
+                ],
+                ordered=False,
+                session=session
+            )
+            print(f"Upserted {len(daily_stats)} student daily stats")
+        db.student_daily_stats.delete_many(stale, session=session)
+        refresh_current_rankings(db, class_id, export_date, [s.model_dump() for s in daily_stats], session)
+        sync_student_roster(db, class_id, export_date, student_stats.keys(), session)
         
-        # Insert overall daily stats
+        # Upsert overall daily stats
         overall_stats = DailyOverallStats(
+            class_id=class_id,
             export_date=export_date,
             total_mastery_points=total_mastery,
             total_perseverance_points=total_perseverance,
@@ -115,43 +664,342 @@ def insert_to_mongodb(csv_data, export_date):
             average_mastery_points=total_mastery / len(student_stats) if student_stats else 0,
             average_perseverance_points=total_perseverance / len(student_stats) if student_stats else 0
         )
-        db.daily_overall_stats.insert_one(overall_stats.model_dump())
-        print("Inserted daily overall stats")
+        db.daily_overall_stats.replace_one(
+            {"class_id": class_id, "export_date": export_date}, overall_stats.model_dump(), upsert=True, session=session
+        )
+        print("Upserted daily overall stats")
+        
+        # The next export's stored changes must stay valid against this date
+        if next_date is not None:
+            reconcile_next_snapshot(db, class_id, next_date, baseline, current, session)
+        
+        if carried is not None:
+            carried.export_date = export_date
+            carried.snapshot = current
+            carried.totals.update({
+                s.student_name: {
+                    "total_mastery_points": s.total_mastery_points,
+                    "total_perseverance_points": s.total_perseverance_points
+                }
+                for s in daily_stats
+            })
+        return written
+    except Exception:
+        if carried is not None:
+            carried.clear()
+        raise
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+def check_manifest(db, path):
+    """Decide whether a file still needs importing.
+
+    Returns (needs_import, content_hash). A completed entry whose size and
+    mtime still match is skipped without reading the file; otherwise the
+    content hash decides, so a touched but unchanged file is not re-imported.
+    """
+    stat = path.stat()
+    entry = db.import_manifest.find_one({"_id": path.name})
+    complete = entry is not None and entry.get("status") == "complete"
+    if complete and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return False, entry["content_hash"]
+    
+    content_hash = file_hash(path)
+    if complete and entry.get("content_hash") == content_hash:
+        db.import_manifest.update_one(
+            {"_id": path.name},
+            {"$set": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}}
+        )
+        return False, content_hash
+    return True, content_hash
+
+def claim_file(db, path, content_hash, export_date, class_id):
+    """Atomically mark a file in_progress in the manifest.
+
+    Fails while another importer (the upload worker, --watch or a CLI run)
+    holds a fresh claim on the file, or once this content is complete, so
+    two processes never write the same date at once. Returns True when
+    this process may import the file.
+    """
+    stat = path.stat()
+    cutoff = datetime.utcnow() - timedelta(seconds=IMPORT_CLAIM_TIMEOUT)
+    try:
+        db.import_manifest.find_one_and_update(
+            {"_id": path.name, "$nor": [
+                {"status": "in_progress", "started_at": {"$gte": cutoff}},
+                {"status": "complete", "content_hash": content_hash}
+            ]},
+            {"$set": {
+                "class_id": class_id,
+                "export_date": export_date,
+                "content_hash": content_hash,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "status": "in_progress",
+                "started_at": datetime.utcnow()
+            }, "$unset": {"error": ""}},
+            upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # The entry exists but did not match: someone else has the file
+        return False
+    return True
+
+def commit_file(db, path, content_hash, export_date, records, student_stats, carried=None):
+    """Write one export and track its progress in the import manifest.
+
+    Returns the number of assignment records written, or None when another
+    importer has claimed the file.
+    """
+    class_id = parse_class_from_filename(path)
+    if not claim_file(db, path, content_hash, export_date, class_id):
+        print(f"{path.name} was claimed by another import. Skipping...")
+        if carried is not None:
+            carried.clear()
+        return None
+    try:
+        written = import_daily_data(records, student_stats, class_id, export_date, db, carried)
     except Exception as e:
-        print(f"Error processing CSV: {str(e)}")
+        if carried is not None:
+            carried.clear()
+        db.import_manifest.update_one(
+            {"_id": path.name},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()}}
+        )
+        raise
+    
+    db.import_manifest.update_one(
+        {"_id": path.name},
+        {"$set": {"status": "complete", "rows_written": written, "finished_at": datetime.utcnow()}}
+    )
+    return written
+
+def iter_with_progress(records, on_progress):
+    """Pass records through, reporting the running count every batch"""
+    count = 0
+    for count, record in enumerate(records, 1):
+        if count % BATCH_SIZE == 0:
+            on_progress(count)
+        yield record
+    on_progress(count)
+
+def import_file(path, db=None, carried=None, on_progress=None):
+    """Import one export file unless the manifest shows it is already in.
+
+    `on_progress`, if given, is called with the number of rows scored so far.
+    Returns the number of assignment records written, or None when the
+    manifest shows the file was already imported.
+    """
+    db = db if db is not None else get_database()
+    if db is None:
+        return 0
+    
+    needs_import, content_hash = check_manifest(db, path)
+    if not needs_import:
+        print(f"{path.name} is unchanged since its last import. Skipping...")
+        if carried is not None:
+            carried.clear()
+        return None
+    
+    export_date = parse_date_from_filename(path)
+    student_stats = {}
+    records = iter_file_records(path, export_date, student_stats)
+    if on_progress is not None:
+        records = iter_with_progress(records, on_progress)
+    return commit_file(db, path, content_hash, export_date, records, student_stats, carried)
+
+def score_file(path):
+    """Parse and score one export in a worker process"""
+    start = time.perf_counter()
+    export_date = parse_date_from_filename(path)
+    student_stats = {}
+    records = list(iter_file_records(path, export_date, student_stats))
+    return export_date, records, student_stats, time.perf_counter() - start
+
+def backfill(files, workers=None):
+    """Score files in parallel and commit them in export_date order.
+
+    Cumulative totals depend on the previous day, so only parsing fans out;
+    writes go through one client, oldest export first. At most two files per
+    worker are held in memory while waiting to be written. Each class keeps
+    its own carried state, so exports of several classes can be mixed.
+    """
+    db = get_database()
+    if db is None:
+        return
+    
+    files = sorted(files, key=parse_date_from_filename)
+    workers = workers or os.cpu_count() or 1
+    parse_rows = parse_seconds = write_rows = write_seconds = 0
+    carried = defaultdict(CarriedState)
+    started = time.perf_counter()
+    
+    # Files the manifest already has are not parsed at all
+    hashes = {}
+    for file in files:
+        needs_import, content_hash = check_manifest(db, file)
+        if needs_import:
+            hashes[file] = content_hash
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        remaining = iter(hashes)
+        for file in islice(remaining, workers * 2):
+            pending.append((file, pool.submit(score_file, file)))
+        
+        for file in files:
+            if file not in hashes:
+                print(f"{file.name} is unchanged since its last import. Skipping...")
+                carried[parse_class_from_filename(file)].clear()
+                continue
+            
+            _, future = pending.popleft()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                pending.append((next_file, pool.submit(score_file, next_file)))
+            
+            try:
+                export_date, records, student_stats, seconds = future.result()
+            except Exception as e:
+                print(f"Error processing {file.name}: {str(e)}")
+                carried[parse_class_from_filename(file)].clear()
+                continue
+            parse_rows += len(records)
+            parse_seconds += seconds
+            
+            write_start = time.perf_counter()
+            try:
+                written = commit_file(
+                    db, file, hashes[file], export_date, records, student_stats, carried[parse_class_from_filename(file)]
+                )
+            except Exception as e:
+                print(f"Error processing {file.name}: {str(e)}")
+                continue
+            if written is None:
+                continue
+            write_seconds += time.perf_counter() - write_start
+            write_rows += written
+            print(f"{file.name}: parsed {len(records)} rows in {seconds:.2f}s, wrote {written}")
+    
+    elapsed = time.perf_counter() - started
+    print(f"\nBackfill of {len(files)} files finished in {elapsed:.2f}s with {workers} workers")
+    print(f"- parse: {parse_rows / parse_seconds if parse_seconds else 0:,.0f} rows/s per worker")
+    print(f"- write: {write_rows / write_seconds if write_seconds else 0:,.0f} rows/s")
+    print(f"- overall: {write_rows / elapsed if elapsed else 0:,.0f} rows/s")
+
+def scan_exports(directory):
+    """Map every export in the directory to its (size, mtime_ns), in one listing"""
+    exports = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".csv") and not entry.name.startswith(".") and entry.is_file():
+                stat = entry.stat()
+                exports[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+    return exports
+
+def try_import(db, path):
+    """Import one file for --watch; True once it is in, False to try again later"""
+    try:
+        if import_file(path, db) is not None:
+            print(f"Imported {path.name}")
+            return True
+    except Exception as e:
+        print(f"Error processing {path.name}: {str(e)}")
+        return False
+    # None is the manifest's skip, or another importer holding the claim
+    entry = db.import_manifest.find_one({"_id": path.name}, {"status": 1})
+    return entry is not None and entry.get("status") == "complete"
+
+def watch(directory, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE):
+    """Import exports as they appear in the directory, until interrupted.
+
+    The directory is polled every `interval` seconds with a single listing.
+    A new or modified file is imported once its size and mtime have held
+    still for `debounce` seconds, so exports still being copied in are left
+    alone. Ready files go oldest date first; the manifest skips anything
+    already imported, including every file on the first pass. A failed
+    import, or one another run claimed, is retried with a doubling backoff.
+    """
+    db = get_database()
+    if db is None:
+        return
+    
+    print(f"Watching {directory} for new exports (Ctrl+C to stop)")
+    seen = {}      # path -> (stat, first time that stat was observed)
+    imported = {}  # path -> stat when last imported
+    retry = {}     # path -> (stat, when to try again, backoff)
+    ignored = set()
+    try:
+        while True:
+            now = time.monotonic()
+            exports = scan_exports(directory)
+            for path in seen.keys() - exports.keys():
+                del seen[path]
+                imported.pop(path, None)
+                retry.pop(path, None)
+            
+            ready = []
+            for path, stat in exports.items():
+                if path in ignored or imported.get(path) == stat:
+                    continue
+                if path in retry and retry[path][0] == stat and now < retry[path][1]:
+                    continue
+                if path not in seen or seen[path][0] != stat:
+                    seen[path] = (stat, now)
+                elif now - seen[path][1] >= debounce:
+                    try:
+                        ready.append((parse_date_from_filename(path), path, stat))
+                    except (IndexError, ValueError):
+                        print(f"Ignoring {path.name}: no export date in the file name")
+                        ignored.add(path)
+            
+            for export_date, path, stat in sorted(ready):
+                if try_import(db, path):
+                    imported[path] = stat
+                    retry.pop(path, None)
+                else:
+                    backoff = min(retry[path][2] * 2, WATCH_MAX_BACKOFF) if path in retry else interval
+                    retry[path] = (stat, time.monotonic() + backoff, backoff)
+                    print(f"Retrying {path.name} in {backoff:.0f}s")
+            
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
 
 def main():
-    # Get path to CSV files
-    csv_dir = Path(dirname(dirname(abspath(__file__)))) / "documents" / "khan_csv_files"
-    files = list(csv_dir.glob("*.csv"))
+    parser = argparse.ArgumentParser(description="Import Khan Academy CSV exports into MongoDB")
+    parser.add_argument("--dir", type=Path, default=CSV_DIR, help="directory holding the CSV exports")
+    parser.add_argument("--backfill", action="store_true", help="parse files in parallel, commit in date order")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --backfill")
+    parser.add_argument("--watch", action="store_true", help="keep running and import exports as they arrive")
+    args = parser.parse_args()
+    
+    if args.watch:
+        watch(args.dir)
+        return
+    
+    # Import oldest first so each date builds on the one before it
+    files = sorted(args.dir.glob("*.csv"), key=parse_date_from_filename)
     
     if not files:
         print("No CSV files found in the khan_csv_files directory")
         return
     
+    if args.backfill:
+        backfill(files, args.workers)
+        return
+    
     for file in files:
         print(f"\nProcessing {file.name}...")
         try:
-            # Read CSV file with explicit encoding and handle any BOM
-            with open(file, 'r', encoding='utf-8-sig') as csvfile:
-                # Read as CSV first
-                reader = csv.DictReader(csvfile)
-                
-                # Verify column names
-                print("\nCSV headers:", reader.fieldnames)
-                
-                # Convert to list and verify first row
-                data = list(reader)
-                if data:
-                    print("\nFirst row raw data:")
-                    for key, value in data[0].items():
-                        print(f"{key}: '{value}'")
-                
-                print(f"\nRead {len(data)} rows from CSV")
-            
-            # Get date from filename and process
-            export_date = parse_date_from_filename(file)
-            insert_to_mongodb(data, export_date)
+            # Stream the scored rows into the database unless already imported
+            import_file(file)
             print(f"Successfully processed {file.name}")
         except Exception as e:
             print(f"Error processing {file.name}: {str(e)}")
@@ -0,0 +1,79 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add the Backend directory to Python path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from configurations import get_client
+from database.import_state import IMPORT_STATE_ID
+from database.indexes import ensure_indexes
+from scripts.import_khan_csv import DEFAULT_CLASS_ID, parse_class_from_filename
+
+# Collections with one document per export date
+DATED_COLLECTIONS = ("assignment_completions", "student_daily_stats", "daily_overall_stats")
+# Collections describing the state after the latest export
+CURRENT_COLLECTIONS = ("current_rankings", "students", "student_rollups", "class_rollups")
+
+def manifest_classes(db):
+    """Class of each imported export date, from the file names in the manifest"""
+    classes = {}
+    for entry in db.import_manifest.find({}, {"export_date": 1}).sort("export_date", 1):
+        class_id = parse_class_from_filename(Path(entry["_id"]))
+        db.import_manifest.update_one({"_id": entry["_id"]}, {"$set": {"class_id": class_id}})
+        if entry.get("export_date") is not None:
+            classes[entry["export_date"]] = class_id
+    return classes
+
+def drop_unscoped_indexes(db):
+    """Drop the indexes from before class_id so their unique keys stop colliding across classes"""
+    dropped = 0
+    for name in DATED_COLLECTIONS + CURRENT_COLLECTIONS:
+        for index in list(db[name].list_indexes()):
+            keys = list(index["key"])
+            if index["name"] != "_id_" and keys[0] != "class_id":
+                db[name].drop_index(index["name"])
+                dropped += 1
+    return dropped
+
+def migrate(class_id=None):
+    db = get_client()["Amba"]
+    missing = {"class_id": {"$exists": False}}
+
+    classes = {} if class_id else manifest_classes(db)
+    latest_class_id = class_id or (list(classes.values())[-1] if classes else DEFAULT_CLASS_ID)
+
+    for name in DATED_COLLECTIONS:
+        updated = 0
+        for export_date, date_class_id in classes.items():
+            updated += db[name].update_many(
+                {**missing, "export_date": export_date}, {"$set": {"class_id": date_class_id}}
+            ).modified_count
+        # Anything the manifest does not explain belongs to the latest class
+        updated += db[name].update_many(missing, {"$set": {"class_id": latest_class_id}}).modified_count
+        print(f"- {name}: {updated} documents")
+
+    for name in CURRENT_COLLECTIONS:
+        updated = db[name].update_many(missing, {"$set": {"class_id": latest_class_id}}).modified_count
+        print(f"- {name}: {updated} documents")
+
+    print(f"Dropped {drop_unscoped_indexes(db)} indexes without class_id")
+    ensure_indexes(db)
+    db.import_metadata.update_one(
+        {"_id": IMPORT_STATE_ID},
+        {
+            "$set": {"latest_class_id": latest_class_id},
+            "$addToSet": {"class_ids": {"$each": sorted(set(classes.values()) | {latest_class_id})}},
+            "$inc": {"generation": 1}
+        },
+        upsert=True
+    )
+    print("Migration complete; with several classes, set API_DEFAULT_CLASS_ID or pass class_id to the API")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tag data imported before multi-class support with its class_id")
+    parser.add_argument("--class-id", default=None,
+                        help="class to assign everything to; by default it comes from the imported file names")
+    args = parser.parse_args()
+    migrate(args.class_id)
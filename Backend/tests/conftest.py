@@ -0,0 +1,23 @@
+import sys
+from os.path import dirname, abspath
+
+import pytest
+
+# Add the Backend directory to Python path
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from database.mongomock_compat import patch_bulk_sort
+from scripts import import_khan_csv
+
+@pytest.fixture
+def db(monkeypatch):
+    """An in-memory Amba database for the importer, without transactions"""
+    mongomock = pytest.importorskip("mongomock")
+    patch_bulk_sort(monkeypatch.setattr)
+    monkeypatch.setattr(import_khan_csv, "IMPORT_TRANSACTIONS", "off")
+    return mongomock.MongoClient()["Amba"]
+
+@pytest.fixture
+def exports():
+    """The bundled Khan Academy exports, oldest first"""
+    return sorted(import_khan_csv.CSV_DIR.glob("*.csv"), key=import_khan_csv.parse_date_from_filename)
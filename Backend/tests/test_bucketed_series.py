@@ -0,0 +1,52 @@
+import pytest
+
+from database.rollups import period_start
+from routes.khan_data import OVERALL_SERIES_FIELDS, STUDENT_SERIES_FIELDS, bucketed_series_pipeline
+from scripts.import_khan_csv import import_file
+
+def weekly_series(collection, class_id, fields, key_fields=()):
+    """Run the bucketing pipeline, with mongomock's missing $dateTrunc done up front"""
+    for doc in collection.find({"class_id": class_id}):
+        collection.update_one({"_id": doc["_id"]}, {"$set": {"week": period_start(doc["export_date"], "week")}})
+    pipeline = bucketed_series_pipeline({"class_id": class_id, **dict(key_fields)}, "week", fields)
+    pipeline[2]["$group"]["_id"] = "$week"
+    return list(collection.aggregate(pipeline))
+
+@pytest.fixture
+def imported(db, exports):
+    for path in exports[:7]:
+        import_file(path, db)
+    return db, db.import_metadata.find_one()["latest_class_id"]
+
+def test_class_weeks_match_the_class_rollups(imported):
+    db, class_id = imported
+    series = weekly_series(db.daily_overall_stats, class_id, OVERALL_SERIES_FIELDS)
+    rollups = list(db.class_rollups.find({"class_id": class_id, "period": "week"}).sort("period_start", 1))
+    assert len(series) == len(rollups) > 1
+    assert any(rollup["days"] > 1 for rollup in rollups)
+    for point, rollup in zip(series, rollups):
+        assert point["period_start"] == rollup["period_start"]
+        assert point["export_date"] == rollup["last_export_date"]
+        assert point["days"] == rollup["days"]
+        assert point["total_mastery_points"] == rollup["mastery_points_gained"]
+        assert point["total_perseverance_points"] == pytest.approx(rollup["perseverance_points_gained"])
+        assert point["total_course_challenges_passed"] == rollup["course_challenges_passed"]
+        assert point["average_mastery_points"] == pytest.approx(rollup["average_mastery_points"])
+        assert point["average_perseverance_points"] == pytest.approx(rollup["average_perseverance_points"])
+
+def test_student_weeks_match_the_student_rollups(imported):
+    db, class_id = imported
+    student_name = db.students.find_one({"class_id": class_id})["student_name"]
+    series = weekly_series(db.student_daily_stats, class_id, STUDENT_SERIES_FIELDS, {"student_name": student_name})
+    rollups = list(db.student_rollups.find(
+        {"class_id": class_id, "period": "week", "student_name": student_name}
+    ).sort("period_start", 1))
+    assert len(series) == len(rollups) > 1
+    for point, rollup in zip(series, rollups):
+        assert point["period_start"] == rollup["period_start"]
+        assert point["days"] == rollup["days"]
+        assert point["daily_mastery_points"] == rollup["mastery_points_gained"]
+        assert point["daily_perseverance_points"] == pytest.approx(rollup["perseverance_points_gained"])
+        for field in ("total_mastery_points", "total_perseverance_points", "course_challenges_passed",
+                      "rank_by_mastery", "rank_by_perseverance"):
+            assert point[field] == rollup[field]
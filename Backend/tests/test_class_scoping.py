@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from routes import khan_data
+
+def resolve(monkeypatch, state, class_id=None, default=None):
+    async def current(db):
+        return {"generation": 1, "latest_export_date": None, "latest_class_id": None, "class_ids": [], **state}
+    monkeypatch.setattr(khan_data.import_state, "current", current)
+    monkeypatch.setattr(khan_data, "get_db", lambda: None)
+    monkeypatch.setattr(khan_data, "API_DEFAULT_CLASS_ID", default)
+    return asyncio.run(khan_data.resolve_class_id(class_id))
+
+def test_single_class_is_served_without_class_id(monkeypatch):
+    assert resolve(monkeypatch, {"class_ids": ["physics"], "latest_class_id": "physics"}) == "physics"
+
+def test_several_classes_require_class_id(monkeypatch):
+    state = {"class_ids": ["physics", "chemistry"], "latest_class_id": "chemistry"}
+    with pytest.raises(HTTPException) as error:
+        resolve(monkeypatch, state)
+    assert error.value.status_code == 400
+    assert resolve(monkeypatch, state, class_id="physics") == "physics"
+    assert resolve(monkeypatch, state, default="physics") == "physics"
+
+def test_databases_from_before_class_ids_use_their_only_class(monkeypatch):
+    assert resolve(monkeypatch, {"latest_class_id": "physics"}) == "physics"
+    assert resolve(monkeypatch, {}) == "default"
+
+def test_imports_record_every_class(db, exports, tmp_path):
+    from scripts.import_khan_csv import import_file
+    for class_name in ("Class A", "Class B"):
+        path = tmp_path / exports[0].name.replace("Middle School Physics Kakolo", class_name)
+        path.write_bytes(exports[0].read_bytes())
+        import_file(path, db)
+    assert sorted(db.import_metadata.find_one()["class_ids"]) == ["class-a", "class-b"]
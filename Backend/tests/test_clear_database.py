@@ -0,0 +1,17 @@
+from database.indexes import INDEXES
+from scripts.clear_database import clear_database
+from scripts.import_khan_csv import import_file
+
+def test_cleared_exports_import_again(db, exports):
+    assert import_file(exports[0], db)
+    generation = db.import_metadata.find_one()["generation"]
+
+    clear_database(db)
+    for name in INDEXES:
+        assert db[name].count_documents({}) == 0, name
+    state = db.import_metadata.find_one()
+    assert state["generation"] == generation + 1
+    assert "class_ids" not in state and "latest_export_date" not in state
+
+    assert import_file(exports[0], db)
+    assert db.current_rankings.count_documents({}) == db.students.count_documents({}) > 0
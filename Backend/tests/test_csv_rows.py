@@ -0,0 +1,70 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from database.schemas import iter_assignment_records
+from scripts.import_khan_csv import iter_csv_rows, parse_date_from_filename
+
+HEADER = ("Assignment Name,Student Name,Score At Due Date,Score Best Ever,Points Possible,"
+          "Number Of Attempts,Most Recent Completion Date,Start Date,Due Date,Assignment URL,Assignment Type")
+
+# Rows the exports have, and rows they could have
+MALFORMED_ROWS = [
+    "Forces,ANN BANDA,,,,0,,,,,Exercise",
+    "Forces,ANN BANDA,,80,100,3,,,,,Exercise",
+    "Forces,ANN BANDA,,100,100,2,,,,,Exercise",
+    "  Forces  ,  ANN BANDA  ,,100,100,1,,,,,  Exercise  ",
+    "Physics,ANN BANDA,,90,100,1,,,,,Course Challenge",
+    "Physics,BEN PHIRI,,89.9,100,1,,,,,Course Challenge",
+    "Physics,BEN PHIRI,,5,0,1,,,,,Course Challenge",
+    "Waves,BEN PHIRI,,abc,100,1,,,,,Exercise",
+    "Waves,BEN PHIRI,,50,100,2.5,,,,,Exercise",
+    "Waves,BEN PHIRI,,1e2,1E2,4,,,,,Exercise",
+    "Waves,BEN PHIRI,,-5,100,-1,,,,,Exercise",
+    "Sound,CARA ZULU,,10,10,3,,,,,Video",
+    "Light,CARA ZULU,,10,10,3,,,,,Article",
+    "Light,,,10,10,3,,,,,Exercise",
+    "Light,   ,,10,10,3,,,,,Exercise",
+    "Heat,CARA ZULU,,10,10",
+    "Heat,CARA ZULU,,10,10,1,,,,,Exercise,extra,cells",
+    "",
+    "Heat,DAN MOYO,,10,10,1,,,,,",
+    '"Heat, advanced",DAN MOYO,,10,10,1,,,,,Exercise',
+]
+
+def score(rows, export_date):
+    student_stats = {}
+    records = list(iter_assignment_records(rows, export_date, student_stats))
+    return records, list(student_stats.items())
+
+def dict_reader_rows(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        yield from csv.DictReader(csvfile)
+
+def assert_scored_like_dict_reader(path, export_date):
+    expected = score(dict_reader_rows(path), export_date)
+    actual = score(iter_csv_rows(path), export_date)
+    assert actual == expected
+    # Types matter too: the documents are stored as they come out
+    assert [[type(v) for v in r.values()] for r in actual[0]] == [[type(v) for v in r.values()] for r in expected[0]]
+
+def test_bundled_exports_score_like_dict_reader(exports):
+    assert exports
+    for path in exports:
+        assert_scored_like_dict_reader(path, parse_date_from_filename(path))
+
+def test_malformed_rows_score_like_dict_reader(tmp_path):
+    path = tmp_path / "Downloaded 2025.02.05 - All assignments - Edge Cases.csv"
+    path.write_text("﻿" + HEADER + "\n" + "\n".join(MALFORMED_ROWS) + "\n", encoding="utf-8")
+    assert_scored_like_dict_reader(path, datetime(2025, 2, 5))
+
+@pytest.mark.parametrize("content", [
+    "Assignment Name,Student Name,Score Best Ever,Assignment Type\nForces,ANN BANDA,80,Exercise\n",
+    "",
+    HEADER + "\n"
+])
+def test_missing_columns_and_empty_files_score_like_dict_reader(tmp_path, content):
+    path = tmp_path / "Downloaded 2025.02.05 - All assignments - Few Columns.csv"
+    path.write_text(content, encoding="utf-8")
+    assert_scored_like_dict_reader(path, datetime(2025, 2, 5))
@@ -0,0 +1,61 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from scripts import import_khan_csv
+from scripts.import_khan_csv import check_manifest, claim_file, import_file, parse_date_from_filename
+
+def claim(db, path):
+    _, content_hash = check_manifest(db, path)
+    return claim_file(db, path, content_hash, parse_date_from_filename(path), "class")
+
+def test_only_one_importer_claims_a_file(db, exports):
+    path = exports[0]
+    assert claim(db, path)
+    # The upload worker and --watch both see the file while it is in progress
+    assert not claim(db, path)
+    assert import_file(path, db) is None
+    assert db.assignment_completions.count_documents({}) == 0
+
+def test_stale_claims_can_be_taken_over(db, exports):
+    path = exports[0]
+    assert claim(db, path)
+    db.import_manifest.update_one(
+        {"_id": path.name},
+        {"$set": {"started_at": datetime.utcnow() - timedelta(seconds=import_khan_csv.IMPORT_CLAIM_TIMEOUT + 1)}}
+    )
+    assert import_file(path, db) > 0
+    assert db.import_manifest.find_one({"_id": path.name})["status"] == "complete"
+
+def test_completed_content_is_not_claimed_again(db, exports):
+    path = exports[0]
+    import_file(path, db)
+    assert not claim(db, path)
+
+def test_imports_of_one_class_wait_for_each_other(db, exports, monkeypatch):
+    monkeypatch.setattr(import_khan_csv, "CLASS_LOCK_POLL", 0.01)
+    class_id = import_khan_csv.parse_class_from_filename(exports[1])
+    # Another run is writing a different date of the same class
+    assert import_khan_csv.acquire_class_lock(db, class_id, "other run")
+    assert not import_khan_csv.acquire_class_lock(db, class_id, "this run")
+
+    importer = threading.Thread(target=import_file, args=(exports[1], db))
+    importer.start()
+    time.sleep(0.2)
+    assert importer.is_alive()
+    assert db.assignment_completions.count_documents({}) == 0
+
+    db.import_locks.update_one({"_id": class_id}, {"$unset": {"owner": "", "locked_at": ""}})
+    importer.join(timeout=30)
+    assert not importer.is_alive()
+    assert db.assignment_completions.count_documents({}) > 0
+    # The lock is released once the import is done
+    assert import_khan_csv.acquire_class_lock(db, class_id, "next run")
+
+def test_stale_class_locks_can_be_taken_over(db, exports):
+    assert import_khan_csv.acquire_class_lock(db, "class", "crashed run")
+    db.import_locks.update_one(
+        {"_id": "class"},
+        {"$set": {"locked_at": datetime.utcnow() - timedelta(seconds=import_khan_csv.IMPORT_CLAIM_TIMEOUT + 1)}}
+    )
+    assert import_khan_csv.acquire_class_lock(db, "class", "this run")
@@ -0,0 +1,38 @@
+import shutil
+
+from scripts import import_khan_csv
+from scripts.import_khan_csv import check_manifest, claim_file, parse_date_from_filename, try_import
+
+def run_watch(monkeypatch, db, directory, polls, import_file):
+    """Run watch for a number of polls with the clock advancing a minute per poll"""
+    clock = [0.0]
+    def sleep(seconds):
+        polls[0] -= 1
+        if polls[0] == 0:
+            raise KeyboardInterrupt
+        clock[0] += 60
+    monkeypatch.setattr(import_khan_csv, "get_database", lambda: db)
+    monkeypatch.setattr(import_khan_csv, "import_file", import_file)
+    monkeypatch.setattr(import_khan_csv.time, "sleep", sleep)
+    monkeypatch.setattr(import_khan_csv.time, "monotonic", lambda: clock[0])
+    import_khan_csv.watch(directory, interval=1, debounce=0)
+
+def test_failed_imports_are_retried(db, exports, tmp_path, monkeypatch):
+    shutil.copy(exports[0], tmp_path)
+    attempts = []
+    def flaky_import(path, db):
+        attempts.append(path.name)
+        if len(attempts) == 1:
+            raise ConnectionError("MongoDB is briefly unreachable")
+        return 1
+    run_watch(monkeypatch, db, tmp_path, [6], flaky_import)
+    assert attempts == [exports[0].name] * 2
+
+def test_files_claimed_by_another_run_are_retried(db, exports):
+    path = exports[0]
+    _, content_hash = check_manifest(db, path)
+    assert claim_file(db, path, content_hash, parse_date_from_filename(path), "class")
+    assert not try_import(db, path)
+    # The other run finishes; the manifest now skips the file for good
+    db.import_manifest.update_one({"_id": path.name}, {"$set": {"status": "complete"}})
+    assert try_import(db, path)